@@ -0,0 +1,73 @@
+"""Micro-benchmarks of comment paragraph splitting and cleaning, on long comments
+with heavy formatting. Run with:
+
+    python -m benchmarks.bench_cleaning
+"""
+
+import random
+import re
+import time
+
+from xlsx_rich_text.cell.run import Run
+
+from benchmarks.synthetic import PROPS, WORDS
+from comment_response.parts.paragraph import Paragraph
+
+# (runs per paragraph, words per run)
+CASES = ((10, 40), (200, 3), (2_000, 2), (10_000, 1))
+REPEAT = 5
+
+
+def runs(count: int, words: int, seed: int = 0) -> list[Run]:
+    rng = random.Random(seed)
+    return [
+        Run(
+            "  " + "  ".join(rng.choice(WORDS) for _ in range(words)) + " \t",
+            rng.choice(PROPS),
+        )
+        for _ in range(count)
+    ]
+
+
+def per_run_clean(runs: list[Run], trim: bool = True, clean: bool = True) -> None:
+    """Previous cleaning: one substitution per run, with first/last run found by
+    equality."""
+    for run in runs:
+        if clean:
+            run.text = re.sub(r"[^\S\n]+", " ", run.text)
+        if trim:
+            if run == runs[0]:
+                run.text = run.text.lstrip()
+            if run == runs[-1]:
+                run.text = run.text.rstrip()
+
+
+def single_pass_clean(runs: list[Run], trim: bool = True, clean: bool = True) -> None:
+    Paragraph(runs, trim, clean)
+
+
+def timed(clean, count: int, words: int) -> tuple[float, list[str]]:
+    best = float("inf")
+    for _ in range(REPEAT):
+        paragraph_runs = runs(count, words)
+        start = time.perf_counter()
+        clean(paragraph_runs)
+        best = min(best, time.perf_counter() - start)
+    return best, [run.text for run in paragraph_runs]
+
+
+def main():
+    print(f"{'runs':>7} {'words':>6} {'per-run (ms)':>13} {'single (ms)':>12} speedup")
+    for count, words in CASES:
+        old, old_texts = timed(per_run_clean, count, words)
+        new, new_texts = timed(single_pass_clean, count, words)
+        if old_texts != new_texts:
+            raise AssertionError("Cleaning results differ.")
+        print(
+            f"{count:>7} {words:>6} {old * 1e3:>13.2f} {new * 1e3:>12.2f} "
+            f"{old / new:>7.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
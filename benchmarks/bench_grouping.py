@@ -0,0 +1,33 @@
+"""Benchmark the single-pass grouping engine against the recursive one, and check
+that both produce the same groups. Run with:
+
+    python -m benchmarks.bench_grouping [rows] [levels]
+"""
+
+import sys
+import time
+
+from benchmarks.synthetic import records, section_config
+from comment_response.group import index_group, recursive_group
+from comment_response.group.sort_records import SortRecords
+
+
+def main(rows: int = 100_000, levels: int = 6):
+    data = records(rows, levels=levels, headings=5, runs=1)
+    for ordered in (False, True):
+        sort = SortRecords(section_config(levels, ordered)["sort"])
+        results = {}
+        for name, module in (("recursive", recursive_group), ("index", index_group)):
+            start = time.perf_counter()
+            results[name] = module.group_records(data, sort.key(), sort.by_count)
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:>9} rows={rows} levels={levels} ordered={ordered}: "
+                f"{elapsed:.3f}s"
+            )
+        if results["recursive"] != results["index"]:
+            raise AssertionError("Grouping engines produced different results.")
+
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,64 @@
+"""Benchmark comment group rendering at increasing group sizes.
+
+Rendering a comment group should scale linearly with the number of comments: the
+benchmark fails if the time per comment grows more than `MAX_RATIO` times from the
+smallest group to the largest. Run with:
+
+    python -m benchmarks.bench_parts
+"""
+
+import io
+import time
+
+import docx
+
+from benchmarks.synthetic import records, section_config
+from comment_response.parts.comment_group import CommentGroup
+from comment_response.write import docx as docx_writer
+from comment_response.write import ooxml
+from comment_response.write.styles import create_style
+
+SIZES = (625, 1250, 2500, 5000)
+# Quadratic rendering would be 8 times slower per comment at 8 times the comments
+MAX_RATIO = 2.0
+
+
+def render_stream(group: CommentGroup, config: dict) -> None:
+    stream = io.StringIO()
+    docx_writer.indicate_quantity(group, config["other"]["quantity"])
+    ooxml.write_comments(stream, group, config["other"]["custom"])
+    ooxml.write_response(stream, group, config["other"]["custom"])
+
+
+def render_docx(group: CommentGroup, config: dict) -> None:
+    document = docx.Document()
+    create_style(document, "Comments")
+    create_style(document, "Response")
+    docx_writer.indicate_quantity(group, config["other"]["quantity"])
+    docx_writer.write_comments(document, group, config["other"]["custom"])
+    docx_writer.write_response(document, group, config["other"]["custom"])
+
+
+def main():
+    config = section_config()
+    for name, render in (("stream", render_stream), ("docx", render_docx)):
+        base = None
+        print(f"{name:>6} {'comments':>9} {'seconds':>9} {'us/comment':>11} ratio")
+        for size in SIZES:
+            group = CommentGroup(records(size, seed=size), config)
+            start = time.perf_counter()
+            render(group, config)
+            elapsed = time.perf_counter() - start
+            per_comment = elapsed / size * 1e6
+            base = base or per_comment
+            ratio = per_comment / base
+            print(f"{size:>16} {elapsed:>9.3f} {per_comment:>11.1f} {ratio:>5.2f}")
+        if ratio > MAX_RATIO:
+            raise AssertionError(
+                f"Rendering with {name!r} does not scale linearly: {ratio:.2f} times "
+                f"slower per comment for {SIZES[-1]} comments than for {SIZES[0]}."
+            )
+
+
+if __name__ == "__main__":
+    main()
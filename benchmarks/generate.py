@@ -0,0 +1,268 @@
+"""Generate synthetic comment workbooks.
+
+Writes an xlsx file with the columns of `config.EXAMPLE.toml` ('File Name', 'Document
+Code', 'Heading N', 'Order N', 'Comment Data', 'Response'), rich-text comments and
+multi-paragraph responses. Output is reproducible for the same parameters and seed.
+
+    python -m benchmarks.generate output/bench.xlsx --rows 50000 --levels 3
+"""
+
+import argparse
+import random
+import zipfile
+from dataclasses import dataclass, fields
+from xml.sax.saxutils import escape, quoteattr
+
+from benchmarks.synthetic import COLUMNS, WORDS
+
+SHEETNAME = "Comments"
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+SML_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml"
+
+# Run properties used for formatted runs, as written by Excel.
+RUN_FORMATS = (
+    "<b/>",
+    "<i/>",
+    "<u/>",
+    '<u val="double"/>',
+    "<strike/>",
+    '<strike/><color rgb="FFFF0000"/>',
+    '<vertAlign val="superscript"/>',
+)
+BASE_FONT = '<sz val="11"/><color theme="1"/><rFont val="Calibri"/><family val="2"/>'
+
+
+@dataclass(frozen=True)
+class WorkbookSpec:
+    """Size and shape of a synthetic workbook."""
+
+    rows: int = 1000
+    levels: int = 3  # Heading depth
+    headings: int = 6  # Distinct headings per level
+    group_size: int = 4  # Average comments per comment group
+    comment_words: int = 120  # Average words per comment
+    formatting: float = 0.2  # Fraction of formatted runs
+    response_paragraphs: int = 3  # Paragraphs per response
+    duplicates: float = 0.0  # Fraction of form-letter comments and boilerplate
+    seed: int = 0
+
+
+def column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+class SharedStrings:
+    """Shared string table. Identical strings share an item."""
+
+    def __init__(self):
+        self.items: list[str] = []
+        self.plain: dict[str, int] = {}
+        self.rich: dict[str, int] = {}
+
+    def add_plain(self, text: str) -> int:
+        if text not in self.plain:
+            self.plain[text] = len(self.items)
+            self.items.append(f'<si><t xml:space="preserve">{escape(text)}</t></si>')
+        return self.plain[text]
+
+    def add_rich(self, runs: list[tuple[str, str]]) -> int:
+        """Rich string item. Identical rich strings get the same item, as in Excel."""
+        xml = "".join(
+            f"<r><rPr>{fmt}{BASE_FONT}</rPr>"
+            f'<t xml:space="preserve">{escape(text)}</t></r>'
+            for text, fmt in runs
+        )
+        if xml not in self.rich:
+            self.rich[xml] = len(self.items)
+            self.items.append(f"<si>{xml}</si>")
+        return self.rich[xml]
+
+    def xml(self) -> str:
+        return (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<sst xmlns="{MAIN_NS}" count="{len(self.items)}" '
+            f'uniqueCount="{len(self.items)}">{"".join(self.items)}</sst>'
+        )
+
+
+def rich_runs(
+    rng: random.Random, words: int, formatting: float, paragraphs: int = 1
+) -> list[tuple[str, str]]:
+    """Runs of about `words` words, split in paragraphs by line breaks."""
+    runs = []
+    for paragraph in range(paragraphs):
+        remaining = max(1, int(rng.gauss(words, words / 4)))
+        while remaining > 0:
+            length = min(remaining, rng.randint(1, 12))
+            remaining -= length
+            text = " ".join(rng.choice(WORDS) or "the" for _ in range(length)) + " "
+            fmt = rng.choice(RUN_FORMATS) if rng.random() < formatting else ""
+            runs.append((text, fmt))
+        if paragraph < paragraphs - 1:
+            runs.append(("\n", ""))
+    return runs
+
+
+def headers(spec: WorkbookSpec) -> list[str]:
+    return [
+        COLUMNS["comment_tag"],
+        COLUMNS["commenter"],
+        *(f"Heading {level}" for level in range(1, spec.levels + 1)),
+        *(f"Order {level}" for level in range(1, spec.levels + 1)),
+        COLUMNS["comment"],
+        COLUMNS["response"],
+    ]
+
+
+def iter_rows(spec: WorkbookSpec, strings: SharedStrings):
+    """Cells of each row, by column name, as (cell type, value)."""
+    rng = random.Random(spec.seed)
+    # Form letters and boilerplate responses, from their own generator so workbooks
+    # without duplicates are unchanged.
+    letters_rng = random.Random(spec.seed + 1)
+    letters = [
+        rich_runs(letters_rng, spec.comment_words, spec.formatting) for _ in range(5)
+    ]
+    boilerplate = [
+        rich_runs(
+            letters_rng, spec.comment_words, spec.formatting, spec.response_paragraphs
+        )
+        for _ in range(3)
+    ]
+    group_heading = None
+    for row in range(spec.rows):
+        new_group = group_heading is None or rng.random() < 1 / max(spec.group_size, 1)
+        if new_group:
+            group_heading = [
+                f"Heading {level}.{rng.randint(1, spec.headings)}"
+                for level in range(1, spec.levels + 1)
+            ]
+        commenter = f"Commenter{rng.randint(1, max(spec.rows // 5, 1))}"
+        if spec.duplicates and rng.random() < spec.duplicates:
+            comment = rng.choice(letters)
+        else:
+            comment = rich_runs(rng, spec.comment_words, spec.formatting)
+        cells = {
+            COLUMNS["comment_tag"]: ("s", strings.add_plain(f"{row}-{commenter}")),
+            COLUMNS["commenter"]: ("s", strings.add_plain(commenter)),
+            COLUMNS["comment"]: ("s", strings.add_rich(comment)),
+        }
+        for level, heading in enumerate(group_heading, start=1):
+            cells[f"Heading {level}"] = ("s", strings.add_plain(heading))
+            cells[f"Order {level}"] = ("n", rng.randint(0, 3))
+        if new_group:
+            if spec.duplicates and rng.random() < spec.duplicates:
+                runs = rng.choice(boilerplate)
+            else:
+                runs = rich_runs(
+                    rng, spec.comment_words, spec.formatting, spec.response_paragraphs
+                )
+            cells[COLUMNS["response"]] = ("s", strings.add_rich(runs))
+        yield cells
+
+
+def generate(path: str, spec: WorkbookSpec) -> None:
+    """Write a synthetic workbook to `path`."""
+    columns = headers(spec)
+    strings = SharedStrings()
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as package:
+        package.writestr(
+            "[Content_Types].xml",
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Types xmlns="{CT_NS}">'
+            '<Default Extension="rels" '
+            'ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            f'ContentType="{SML_CT}.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" '
+            f'ContentType="{SML_CT}.worksheet+xml"/>'
+            f'<Override PartName="/xl/styles.xml" ContentType="{SML_CT}.styles+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" '
+            f'ContentType="{SML_CT}.sharedStrings+xml"/></Types>',
+        )
+        package.writestr(
+            "_rels/.rels",
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{PKG_REL_NS}"><Relationship Id="rId1" '
+            f'Type="{DOC_REL}/officeDocument" Target="xl/workbook.xml"/>'
+            "</Relationships>",
+        )
+        package.writestr(
+            "xl/workbook.xml",
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{REL_NS}"><sheets>'
+            f'<sheet name="{SHEETNAME}" sheetId="1" r:id="rId1"/></sheets></workbook>',
+        )
+        package.writestr(
+            "xl/_rels/workbook.xml.rels",
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Relationships xmlns="{PKG_REL_NS}">'
+            f'<Relationship Id="rId1" Type="{DOC_REL}/worksheet" '
+            'Target="worksheets/sheet1.xml"/>'
+            f'<Relationship Id="rId2" Type="{DOC_REL}/styles" Target="styles.xml"/>'
+            f'<Relationship Id="rId3" Type="{DOC_REL}/sharedStrings" '
+            'Target="sharedStrings.xml"/></Relationships>',
+        )
+        package.writestr(
+            "xl/styles.xml",
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<styleSheet xmlns="{MAIN_NS}"><fonts count="1"><font>{BASE_FONT}'
+            '</font></fonts><fills count="1"><fill><patternFill patternType="none"/>'
+            '</fill></fills><borders count="1"><border/></borders>'
+            '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+            "</cellXfs></styleSheet>",
+        )
+        with package.open("xl/worksheets/sheet1.xml", "w") as raw:
+            raw.write(
+                f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<worksheet xmlns="{MAIN_NS}"><sheetData>'.encode()
+            )
+            header = "".join(
+                f'<c r="{column_letter(index)}1" t="s">'
+                f"<v>{strings.add_plain(name)}</v></c>"
+                for index, name in enumerate(columns)
+            )
+            raw.write(f'<row r="1">{header}</row>'.encode())
+            for row_number, cells in enumerate(iter_rows(spec, strings), start=2):
+                xml = []
+                for index, name in enumerate(columns):
+                    if name not in cells:
+                        continue
+                    cell_type, value = cells[name]
+                    ref = quoteattr(f"{column_letter(index)}{row_number}")
+                    xml.append(f'<c r={ref} t="{cell_type}"><v>{value}</v></c>')
+                raw.write(f'<row r="{row_number}">{"".join(xml)}</row>'.encode())
+            raw.write(b"</sheetData></worksheet>")
+        package.writestr("xl/sharedStrings.xml", strings.xml())
+
+
+def parse_spec(args: list[str] | None = None) -> tuple[str, WorkbookSpec]:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    for field in fields(WorkbookSpec):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}", type=type(field.default)
+        )
+    namespace = parser.parse_args(args)
+    spec = WorkbookSpec(
+        **{
+            name: value
+            for name, value in vars(namespace).items()
+            if name != "path" and value is not None
+        }
+    )
+    return namespace.path, spec
+
+
+if __name__ == "__main__":
+    generate(*parse_spec())
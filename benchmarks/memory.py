@@ -0,0 +1,133 @@
+"""Benchmark the memory used to write sections of growing size.
+
+Each workbook has one heading level, with the same number of rows per top-level
+heading, and more top-level headings for more rows. The section is written with each
+writer in a new interpreter, and the tracemalloc peak of the write is measured above
+the memory of the records read from the sheet. The peak of the "spool" writer depends
+on the largest top-level heading, so it should stay flat as the section grows, while
+the peak of the "stream" writer grows with the section. Run with:
+
+    python -m benchmarks.memory --headings 5 20 80 --check
+
+With `--check`, the run fails if the peak of the "spool" writer for the largest section
+exceeds its peak for the smallest section by more than the tolerance.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from benchmarks.generate import SHEETNAME, WorkbookSpec, generate
+from benchmarks.synthetic import section_config
+
+WRITERS = ("stream", "spool")
+
+MEASURE_SCRIPT = """
+import json, sys, tracemalloc
+from comment_response.batch import open_sheet, open_workbook
+from comment_response.logger import profiler
+from comment_response.section import Section
+config = json.loads(sys.argv[1])
+tracemalloc.start()
+sheet = open_sheet(open_workbook(config), config)
+section = Section(sheet, **config["section"])
+section.records
+records = tracemalloc.get_traced_memory()[0]
+profiler.start()
+section.write(config["savename"], 1, config["writer"])
+# Stages reset the tracemalloc peak: read it from the span of the whole write
+(write,) = [s for s in profiler.report()["spans"] if s["name"] == "Section.write"]
+print(json.dumps({"records": records, "write": write["tracemalloc_peak"]}))
+"""
+
+
+def measure(config: dict) -> dict:
+    """Memory of the records, and peak memory of the write above it, in bytes."""
+    result = subprocess.run(
+        [sys.executable, "-c", MEASURE_SCRIPT, json.dumps(config)],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    memory = json.loads(result.stdout.splitlines()[-1])
+    return {"records": memory["records"], "write": memory["write"] - memory["records"]}
+
+
+def main(args: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--headings",
+        type=int,
+        nargs="+",
+        default=[5, 20, 80],
+        help="numbers of top-level headings",
+    )
+    parser.add_argument("--rows-per-heading", type=int, default=50)
+    parser.add_argument("--workdir", type=Path, default=Path("output/bench"))
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.5,
+        help="allowed growth of the 'spool' peak (default: 0.5, i.e. 50%%)",
+    )
+    parser.add_argument("--output", type=Path, help="save results to this JSON file")
+    namespace = parser.parse_args(args)
+
+    workdir = namespace.workdir
+    workdir.mkdir(parents=True, exist_ok=True)
+    results = []
+    header = " ".join(f"{writer:>9}" for writer in WRITERS)
+    print(f"{'Headings':>8} {'Rows':>7} {'Records':>9} {header}")
+    for headings in namespace.headings:
+        spec = WorkbookSpec(
+            rows=headings * namespace.rows_per_heading, levels=1, headings=headings
+        )
+        workbook = workdir / f"memory_{headings}_{spec.rows}.xlsx"
+        if not workbook.exists():
+            generate(str(workbook), spec)
+        config = {
+            "filename": str(workbook),
+            "sheetname": SHEETNAME,
+            "header_row": 1,
+            "reader": "stream",
+            "section": section_config(spec.levels),
+        }
+        peaks = {}
+        for writer in WRITERS:
+            memory = measure(
+                {
+                    **config,
+                    "writer": writer,
+                    "savename": str(workdir / f"memory_{writer}.docx"),
+                }
+            )
+            peaks[writer] = memory["write"]
+        results.append(
+            {"headings": headings, "rows": spec.rows, "records": memory["records"]}
+            | {f"{writer}_peak": peak for writer, peak in peaks.items()}
+        )
+        print(
+            f"{headings:>8} {spec.rows:>7} {memory['records'] / 2**20:>7.1f}MB "
+            + " ".join(f"{peaks[writer] / 2**20:>7.1f}MB" for writer in WRITERS)
+        )
+
+    if namespace.output:
+        namespace.output.parent.mkdir(parents=True, exist_ok=True)
+        namespace.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results to '{namespace.output}'.")
+    if namespace.check:
+        smallest, largest = results[0]["spool_peak"], results[-1]["spool_peak"]
+        if largest > smallest * (1 + namespace.tolerance):
+            print(
+                f"The 'spool' peak grew from {smallest / 2**20:.1f}MB to "
+                f"{largest / 2**20:.1f}MB."
+            )
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
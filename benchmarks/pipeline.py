@@ -0,0 +1,176 @@
+"""Benchmark the full pipeline on a generated workbook.
+
+Generates a synthetic workbook (see `benchmarks.generate`), then times loading the
+records, grouping them, writing the section and writing the AutoMark document. Time,
+tracemalloc peak and peak RSS of each stage are saved as JSON, and can be compared
+against a saved baseline. Run with:
+
+    python -m benchmarks.pipeline --rows 50000 --output output/bench.json
+    python -m benchmarks.pipeline --rows 50000 --compare output/bench.json
+
+With `--compare`, the run fails if any stage is slower than the baseline by more than
+the tolerance.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, fields
+from pathlib import Path
+
+from benchmarks.generate import SHEETNAME, WorkbookSpec, generate
+from benchmarks.synthetic import section_config
+from comment_response.batch import open_sheet, open_workbook
+from comment_response.logger import profiler
+from comment_response.section import Section
+
+STAGES = ("load", "group", "section", "automark")
+
+
+@contextmanager
+def measure(results: dict, name: str, trace: bool):
+    """Record time, tracemalloc peak and peak RSS of a stage."""
+    if trace:
+        tracemalloc.reset_peak()
+    start = time.perf_counter()
+    yield
+    results[name] = {
+        "seconds": round(time.perf_counter() - start, 6),
+        "tracemalloc_peak": tracemalloc.get_traced_memory()[1] if trace else None,
+        "max_rss": profiler.max_rss(),
+    }
+    print(f"{name:>9}: {results[name]['seconds']:.3f}s")
+
+
+def run(
+    spec: WorkbookSpec,
+    workdir: Path,
+    reader: str = "stream",
+    writer: str = "stream",
+    workers: int = 1,
+    trace: bool = True,
+) -> dict:
+    """Generate a workbook and time each stage of the pipeline."""
+    workdir.mkdir(parents=True, exist_ok=True)
+    workbook = workdir / f"bench_{spec.rows}_{spec.levels}_{spec.seed}.xlsx"
+    if not workbook.exists():
+        generate(str(workbook), spec)
+
+    config = {
+        "filename": str(workbook),
+        "sheetname": SHEETNAME,
+        "header_row": 1,
+        "reader": reader,
+        "section": section_config(spec.levels),
+    }
+    stages = {}
+    profiler.start()
+    if trace:
+        tracemalloc.start()
+    try:
+        with measure(stages, "load", trace):
+            sheet = open_sheet(open_workbook(config), config)
+            section = Section(sheet, **config["section"])
+            section.records
+        with measure(stages, "group", trace):
+            section.section_data()
+        # Grouping is repeated by the write, so 'section' includes it.
+        with measure(stages, "section", trace):
+            section.write(workdir / "section.docx", 1, writer, workers)
+        with measure(stages, "automark", trace):
+            section.automark.write(workdir / "automark.docx")
+    finally:
+        if trace:
+            tracemalloc.stop()
+
+    return {
+        "spec": asdict(spec),
+        "options": {"reader": reader, "writer": writer, "workers": workers},
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "stages": stages,
+        "counters": profiler.report()["counters"],
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Stages slower than the baseline by more than `tolerance` (a fraction)."""
+    if results["spec"] != baseline["spec"]:
+        print("Warning: workbook parameters differ from the baseline.")
+    regressions = []
+    print(f"{'Stage':>9} {'Baseline':>9} {'Current':>9} {'Ratio':>7}")
+    for name in STAGES:
+        if name not in baseline["stages"]:
+            continue
+        before = baseline["stages"][name]["seconds"]
+        after = results["stages"][name]["seconds"]
+        ratio = after / before if before else float("inf")
+        print(f"{name:>9} {before:>8.3f}s {after:>8.3f}s {ratio:>7.2f}")
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(args: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    for field in fields(WorkbookSpec):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}", type=type(field.default)
+        )
+    parser.add_argument("--reader", default="stream")
+    parser.add_argument("--writer", default="stream")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--workdir", type=Path, default=Path("output/bench"))
+    parser.add_argument(
+        "--no-tracemalloc",
+        dest="trace",
+        action="store_false",
+        help="do not trace memory peaks (tracing slows the run)",
+    )
+    parser.add_argument("--output", type=Path, help="save results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="baseline JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="allowed slowdown against the baseline (default: 0.1, i.e. 10%%)",
+    )
+    return parser.parse_args(args)
+
+
+def main(args: list[str] | None = None) -> int:
+    namespace = parse_args(args)
+    spec = WorkbookSpec(
+        **{
+            field.name: getattr(namespace, field.name)
+            for field in fields(WorkbookSpec)
+            if getattr(namespace, field.name) is not None
+        }
+    )
+    results = run(
+        spec,
+        namespace.workdir,
+        namespace.reader,
+        namespace.writer,
+        namespace.workers,
+        namespace.trace,
+    )
+    if namespace.output:
+        namespace.output.parent.mkdir(parents=True, exist_ok=True)
+        namespace.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results to '{namespace.output}'.")
+    if namespace.compare:
+        baseline = json.loads(namespace.compare.read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, namespace.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
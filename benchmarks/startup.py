@@ -0,0 +1,111 @@
+"""Benchmark start-up: package import time and cold runs of a small section.
+
+Each measurement runs in a new interpreter, so module imports and template building
+are included as they would be for a single run of the script. Cold runs write a small
+single-heading section with the "stream" reader and writer, without and with a
+template cache (the first run fills the cache). Run with:
+
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.generate import SHEETNAME, WorkbookSpec, generate
+from benchmarks.synthetic import section_config
+
+IMPORT_SCRIPT = """
+import sys, time
+start = time.perf_counter()
+import comment_response.batch
+print(time.perf_counter() - start, "docx" in sys.modules)
+"""
+
+RUN_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from comment_response.batch import write_sections
+write_sections(json.loads(sys.argv[1]))
+print(time.perf_counter() - start, "docx" in sys.modules)
+"""
+
+
+def run_script(script: str, *args: str) -> tuple[float, float, bool]:
+    """Process time, in-process time and whether python-docx was imported."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", script, *args],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    process = time.perf_counter() - start
+    seconds, docx_loaded = result.stdout.split()[-2:]
+    return process, float(seconds), docx_loaded == "True"
+
+
+def measure(name: str, repeat: int, script: str, *args: str) -> dict:
+    runs = [run_script(script, *args) for _ in range(repeat)]
+    result = {
+        "process": statistics.median(run[0] for run in runs),
+        "in_process": statistics.median(run[1] for run in runs),
+        "docx_loaded": runs[-1][2],
+    }
+    print(
+        f"{name:>22}: {result['process']:.3f}s process, "
+        f"{result['in_process']:.3f}s in process, "
+        f"python-docx {'loaded' if result['docx_loaded'] else 'not loaded'}"
+    )
+    return result
+
+
+def main(args: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--rows", type=int, default=20)
+    parser.add_argument("--workdir", type=Path, default=Path("output/bench"))
+    parser.add_argument("--output", type=Path, help="save results to this JSON file")
+    namespace = parser.parse_args(args)
+
+    spec = WorkbookSpec(rows=namespace.rows, levels=1, headings=1)
+    workdir = namespace.workdir
+    workdir.mkdir(parents=True, exist_ok=True)
+    workbook = workdir / f"startup_{spec.rows}.xlsx"
+    generate(str(workbook), spec)
+    config = {
+        "filename": str(workbook),
+        "sheetname": SHEETNAME,
+        "header_row": 1,
+        "reader": "stream",
+        "writer": "stream",
+        "outline_level": 1,
+        "savename": str(workdir / "startup_section.docx"),
+        "automark": str(workdir / "startup_automark.docx"),
+        "section": section_config(spec.levels),
+    }
+    cached = {**config, "template_cache": str(workdir / "templates")}
+
+    results = {
+        "import": measure("import", namespace.repeat, IMPORT_SCRIPT),
+        "cold": measure("cold run", namespace.repeat, RUN_SCRIPT, json.dumps(config)),
+        "cold_template_cache": measure(
+            "cold run, cached template",
+            namespace.repeat,
+            RUN_SCRIPT,
+            json.dumps(cached),
+        ),
+    }
+    if namespace.output:
+        namespace.output.parent.mkdir(parents=True, exist_ok=True)
+        namespace.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved results to '{namespace.output}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Synthetic in-memory records for benchmarks.
+
+Records mimic the parts of `xlsx_rich_text` records used by the comment-response
+script: `record.col[name].value` is a rich-text value with `text`, `runs` and
+`paragraphs`, and cells convert with `str()`/`int()`.
+"""
+
+import random
+from dataclasses import dataclass
+
+from xlsx_rich_text.cell.run import Run
+
+WORDS = (
+    "the rule proposed regulation emission  standards comment response vehicle "
+    "fleet compliance  cost analysis staff board "
+).split(" ")
+PROPS = (
+    {},
+    {"b": {}},
+    {"i": {}},
+    {"u": {"val": "double"}},
+    {"strike": {}, "color": {"rgb": "FFFF0000"}},
+    {"vertAlign": {"val": "superscript"}},
+)
+
+COLUMNS = {
+    "comment": "Comment Data",
+    "comment_tag": "File Name",
+    "commenter": "Document Code",
+    "response": "Response",
+}
+
+
+@dataclass
+class SyntheticParagraph:
+    runs: list[Run]
+
+
+class SyntheticRichText:
+    def __init__(self, runs: list[Run]):
+        self.runs = runs
+
+    @property
+    def text(self) -> str:
+        return "".join(run.text for run in self.runs)
+
+    @property
+    def paragraphs(self) -> list[SyntheticParagraph]:
+        paras, current = [], []
+        for run in self.runs:
+            for piece_no, piece in enumerate(run.text.split("\n")):
+                if piece_no:
+                    paras.append(SyntheticParagraph(current))
+                    current = []
+                if piece:
+                    current.append(Run(piece, run.props))
+        paras.append(SyntheticParagraph(current))
+        return [para for para in paras if para.runs]
+
+    def __str__(self):
+        return self.text
+
+
+class SyntheticCell:
+    def __init__(self, value):
+        self.value = value
+
+    def __bool__(self):
+        return bool(self.value)
+
+    def __str__(self):
+        return "" if self.value is None else str(self.value)
+
+    def __int__(self):
+        return int(self.value or 0)
+
+
+class SyntheticRecord:
+    def __init__(self, col: dict[str, SyntheticCell]):
+        self.col = col
+
+    def __getitem__(self, column: str) -> SyntheticCell:
+        return self.col[column]
+
+
+def rich_text(rng: random.Random, runs: int, words: int = 12) -> SyntheticRichText:
+    text_runs = []
+    for _ in range(runs):
+        text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, words)))
+        if rng.random() < 0.1:
+            text += "\n"
+        text_runs.append(Run(text + " ", dict(rng.choice(PROPS))))
+    return SyntheticRichText(text_runs)
+
+
+def records(
+    rows: int,
+    levels: int = 3,
+    headings: int = 8,
+    runs: int = 6,
+    response_rate: float = 0.2,
+    seed: int = 0,
+) -> list[SyntheticRecord]:
+    """Generate records with `levels` heading columns ('Heading N') and matching
+    order columns ('Order N')."""
+    rng = random.Random(seed)
+    result = []
+    for row in range(rows):
+        col = {
+            COLUMNS["comment"]: SyntheticCell(rich_text(rng, rng.randint(1, runs))),
+            COLUMNS["comment_tag"]: SyntheticCell(f"{row // 3}-{row}"),
+            COLUMNS["commenter"]: SyntheticCell(f"{row // 3}"),
+            COLUMNS["response"]: SyntheticCell(
+                rich_text(rng, 3) if rng.random() < response_rate else None
+            ),
+        }
+        for level in range(1, levels + 1):
+            col[f"Heading {level}"] = SyntheticCell(
+                f"Heading {rng.randint(1, headings)}" if rng.random() < 0.95 else ""
+            )
+            col[f"Order {level}"] = SyntheticCell(rng.randint(0, 3))
+        result.append(SyntheticRecord(col))
+    return result
+
+
+def section_config(levels: int = 3, ordered: bool = False) -> dict:
+    """Section configuration matching `records`."""
+    return {
+        "columns": dict(COLUMNS),
+        "sort": {
+            "by_count": True,
+            "title": [f"Heading {level}" for level in range(1, levels + 1)],
+            "ordered": (
+                [f"Order {level}" for level in range(1, levels + 1)] if ordered else []
+            ),
+        },
+        "other": {
+            "clean": {"clean": True, "trim": True},
+            "custom": {
+                "comment_intro": "Comment",
+                "comment_intro_every_comment": False,
+                "response_intro": "Response",
+                "intro_sep": ": ",
+            },
+            "quantity": {
+                "indicate_quantity": True,
+                "multiple_comments": "Multiple Comments: ",
+                "single_comment": "Comment: ",
+            },
+        },
+    }
@@ -1,21 +1,77 @@
 """Main script"""
 
+import argparse
+import time
 import tomllib
-from xlsx_rich_text import Workbook
 
-from comment_response import Section
+from comment_response.batch import timing_summary, write_sections
+from comment_response.group.query import RESPONSE_FILTERS
+from comment_response.logger import profiler
 
 
 def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="write the sections again whenever the spreadsheet is saved",
+    )
+    filters = parser.add_argument_group(
+        "filter",
+        "write only part of the sections (replaces [section.filter] settings, "
+        "including those of [[sections]])",
+    )
+    filters.add_argument(
+        "--heading",
+        action="append",
+        dest="headings",
+        help="heading path to keep, e.g. 'Air Quality > Ozone' (repeatable)",
+    )
+    filters.add_argument(
+        "--tag", action="append", dest="tags", help="comment tag to keep (repeatable)"
+    )
+    filters.add_argument(
+        "--commenter",
+        action="append",
+        dest="commenters",
+        help="commenter to keep (repeatable)",
+    )
+    filters.add_argument(
+        "--response",
+        choices=RESPONSE_FILTERS,
+        help="keep comment groups with a response, without one, or all groups",
+    )
+    args = parser.parse_args()
+
     with open("config.toml", "rb") as toml:
         config = tomllib.load(toml)
 
-    book = Workbook(config["filename"])
-    sheet = book.sheet(config["sheetname"], header_row=config["header_row"])
+    query = {
+        key: getattr(args, key)
+        for key in ("headings", "tags", "commenters", "response")
+        if getattr(args, key) is not None
+    }
+    # Each [[sections]] entry overrides the top-level filter, so it gets the CLI keys too
+    for table in (config, *config.get("sections", [])):
+        table.setdefault("section", {}).setdefault("filter", {}).update(query)
+
+    if args.watch:
+        from comment_response.watch import watch
+
+        profiler.start(config.get("profile"))
+        try:
+            watch(config)
+        finally:
+            profiler.finish()  # Report of all the rebuilds of the session
+        return
 
-    section = Section(sheet, **config["section"])
-    section.write(config["savename"], config["outline_level"])
-    section.automark.write(config["automark"])
+    start = time.perf_counter()
+    profiler.start(config.get("profile"))
+    timings = write_sections(config)
+    profiler.finish()
+    if "sections" in config:
+        print(timing_summary(timings))
+        print(f"Elapsed: {time.perf_counter() - start:.2f}s")
 
 
 if __name__ == "__main__":
@@ -1 +1,10 @@
-from .section import Section
+"""Comment-response section writer. `Section` is imported on first access, so
+importing a submodule does not load the whole package."""
+
+
+def __getattr__(name: str):
+    if name == "Section":
+        from .section import Section
+
+        return Section
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,191 @@
+"""Write one or more comment-response sections from a configuration.
+
+A configuration with a `[[sections]]` list writes every listed section in one process.
+Each entry overrides the top-level settings (e.g. `filename`, `sheetname`, `savename`,
+`automark`, or keys of `[section]`). Each workbook is opened once and shared by all of
+its sheets, and sections are written in a thread pool.
+
+Threads only overlap the I/O of the sections (reading workbooks, compressing and
+writing packages, which release the GIL): rendering is CPU-bound and runs one section
+at a time under the GIL. Use `workers` to render the groups of a section in parallel
+processes.
+
+With `pipeline`, the section and automark documents of a section are written in
+threads once the records are read, and rendering the section overlaps saving it.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from comment_response.read.sheet_cache import SheetCache
+from comment_response.read.xlsx import StreamingWorkbook
+from comment_response.section import (
+    Section,
+    check_exports,
+    check_writer,
+    required_columns,
+)
+from comment_response.write.automark import DEFAULT_VARIANT
+from comment_response.write.cache import FragmentCache
+from comment_response.write.package import DEFAULT_COMPRESSION
+
+
+@dataclass(frozen=True)
+class SectionTiming:
+    """Records and writing time of a section, for the timing summary."""
+
+    savename: str
+    sheetname: str
+    records: int
+    seconds: float
+
+
+def merge(defaults: dict, overrides: dict) -> dict:
+    """Merge configuration tables recursively."""
+    merged = dict(defaults)
+    for key, value in overrides.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def section_configs(config: dict) -> list[dict]:
+    """Configuration of each section to write."""
+    defaults = {key: value for key, value in config.items() if key != "sections"}
+    if "sections" not in config:
+        return [defaults]
+    return [merge(defaults, overrides) for overrides in config["sections"]]
+
+
+def open_workbook(config: dict):
+    if config.get("reader", "xlsx_rich_text") == "stream":
+        return StreamingWorkbook(config["filename"])
+    from xlsx_rich_text import Workbook  # Only loaded for the default reader
+
+    return Workbook(config["filename"])
+
+
+def open_sheet(book, config: dict):
+    if isinstance(book, StreamingWorkbook) and config.get("sheet_cache"):
+        return SheetCache(config["sheet_cache"]).sheet(
+            book,
+            config["sheetname"],
+            header_row=config["header_row"],
+            columns=required_columns(config["section"]),
+        )
+    if isinstance(book, StreamingWorkbook):
+        return book.sheet(
+            config["sheetname"],
+            header_row=config["header_row"],
+            columns=required_columns(config["section"]),
+        )
+    return book.sheet(config["sheetname"], header_row=config["header_row"])
+
+
+def write_section(book, config: dict) -> SectionTiming:
+    """Write section and automark documents of a configuration."""
+    start = time.perf_counter()
+    sheet = open_sheet(book, config)
+
+    cache = None
+    if config.get("cache"):
+        cache = FragmentCache(config["cache"], config.get("cache_size", 512) * 2**20)
+
+    compression = config.get("compression", DEFAULT_COMPRESSION)
+    writer = config.get("writer", "docx")
+    options = {
+        "writer": writer,
+        "workers": config.get("workers", 1),
+        "cache": cache,
+        # Writing the section and AutoMark at the same time works with every writer;
+        # only saving the section while it is rendered needs the "stream" writer.
+        "pipeline": config.get("pipeline", False) and writer == "stream",
+        "compression": compression,
+        "template_cache": config.get("template_cache") or None,
+    }
+    # Check the options before anything is written (concurrently, with 'pipeline')
+    check_writer(writer, options["workers"], cache, options["pipeline"])
+    check_exports(config.get("exports"), options["workers"], options["pipeline"])
+    if config.get("shards") and config.get("exports"):
+        raise ValueError("Exports are not supported with shards.")
+    section = Section(sheet, **config["section"])
+    if config.get("shards"):
+        write = lambda: section.write_shards(
+            config["savename"],
+            config["outline_level"],
+            config.get("shard_groups", 0),
+            **options,
+        )
+    else:
+        write = lambda: section.write(
+            config["savename"],
+            config["outline_level"],
+            exports=config.get("exports"),
+            **options,
+        )
+    write_automark = lambda: section.automark.write_variants(
+        {config["automark"]: DEFAULT_VARIANT, **config.get("automark_variants", {})},
+        compression,
+        options["template_cache"],
+    )
+    if config.get("pipeline"):
+        import asyncio  # Only loaded for pipelined runs
+
+        asyncio.run(write_concurrently(section, write, write_automark))
+    else:
+        write()
+        write_automark()
+    return SectionTiming(
+        config["savename"],
+        config["sheetname"],
+        len(section.records),
+        time.perf_counter() - start,
+    )
+
+
+async def write_concurrently(section, *writes) -> None:
+    """Read the records, then run the writes concurrently in worker threads. The
+    writes only share the records, which are read-only."""
+    import asyncio
+
+    await asyncio.to_thread(lambda: section.records)
+    await asyncio.gather(*(asyncio.to_thread(write) for write in writes))
+
+
+def write_sections(config: dict) -> list[SectionTiming]:
+    """Write all sections of a configuration, opening each workbook once. Up to
+    `batch_workers` sections are written in threads, which overlap their I/O but not
+    their rendering (see the module docstring)."""
+    configs = section_configs(config)
+    books = {}
+    for section_config in configs:
+        key = (section_config["filename"], section_config.get("reader"))
+        if key not in books:
+            books[key] = open_workbook(section_config)
+
+    with ThreadPoolExecutor(max_workers=config.get("batch_workers")) as executor:
+        return list(
+            executor.map(
+                lambda section_config: write_section(
+                    books[(section_config["filename"], section_config.get("reader"))],
+                    section_config,
+                ),
+                configs,
+            )
+        )
+
+
+def timing_summary(timings: list[SectionTiming]) -> str:
+    width = max([len(timing.savename) for timing in timings] + [7])
+    lines = [f"{'Section':<{width}}  {'Sheet':<20} {'Records':>8} {'Seconds':>8}"]
+    for timing in timings:
+        lines.append(
+            f"{timing.savename:<{width}}  {timing.sheetname:<20} "
+            f"{timing.records:>8} {timing.seconds:>8.2f}"
+        )
+    total = sum(timing.seconds for timing in timings)
+    lines.append(f"{'Total (sum of sections)':<{width + 31}} {total:>8.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,70 @@
+"""
+Columnar store of the heading columns used for grouping.
+
+The title and order columns of each heading level are read from the records once, in a
+single pass. Each level is kept as an array of integer ranks into the sorted, distinct
+headings of that level, so grouping sorts and compares machine integers instead of
+cells. Rows are positions in the record list, so comment and response cells are only
+looked up when a group is written.
+"""
+
+import sys
+from array import array
+from collections.abc import Sequence
+
+from xlsx_rich_text.sheets.record import Record
+
+from comment_response.group.sort_records import Heading
+
+NO_HEADING = -1  # Rank of levels after the first empty heading of a row
+
+
+class RecordColumns:
+    """Heading ranks of each row, by level."""
+
+    def __init__(self, records: Sequence[Record], sort_cols: list[tuple[str, str]]):
+        self.size = len(records)
+        self.depth = len(sort_cols)
+        codes: list[dict[tuple[int, str], int]] = [{} for _ in sort_cols]
+        self.ranks = [array("l", [NO_HEADING]) * self.size for _ in sort_cols]
+
+        for row, record in enumerate(records):
+            get = record.col.get
+            for (number_col, title_col), level_codes, column in zip(
+                sort_cols, codes, self.ranks
+            ):
+                heading = (
+                    int(get(number_col, 0)),
+                    sys.intern(str(get(title_col, ""))),
+                )
+                column[row] = level_codes.setdefault(heading, len(level_codes))
+                if not (heading[0] or heading[1]):
+                    break
+
+        # Replace the codes, in order of appearance, by ranks of the sorted headings.
+        self.headings: list[list[Heading]] = []
+        for level_codes, column in zip(codes, self.ranks):
+            level_headings = sorted(level_codes)
+            code_ranks = array("l", [0]) * len(level_codes)
+            for rank, heading in enumerate(level_headings):
+                code_ranks[level_codes[heading]] = rank
+            for row, code in enumerate(column):
+                if code != NO_HEADING:
+                    column[row] = code_ranks[code]
+            self.headings.append([Heading(*heading) for heading in level_headings])
+
+    def key(self, row: int) -> tuple[int, ...]:
+        """Heading ranks of a row, up to its first empty heading."""
+        key = tuple(column[row] for column in self.ranks)
+        if NO_HEADING in key:
+            return key[: key.index(NO_HEADING)]
+        return key
+
+    def sort_keys(self) -> list[int]:
+        """Single integer sort key of each row. Ranks are packed level by level (with
+        0 for missing levels), so rows sort as their `key` tuples would."""
+        keys = [0] * self.size
+        for level_headings, column in zip(self.headings, self.ranks):
+            radix = len(level_headings) + 1
+            keys = [key * radix + rank + 1 for key, rank in zip(keys, column)]
+        return keys
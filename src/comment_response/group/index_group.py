@@ -0,0 +1,125 @@
+"""
+Single-pass grouping of records into nested headings.
+
+Produces the same structure as `recursive_group.group_records`, but the heading
+columns are read once into a `RecordColumns` store, the rows are sorted once on integer
+keys, and the tree is built in one linear pass over the sorted rows. With a
+`StatisticsIndex`, the statistics of each node are collected in the same pass.
+`iter_group_columns` yields each top-level node as soon as its rows are grouped.
+"""
+
+from collections.abc import Iterable, Iterator, Sequence
+
+from xlsx_rich_text.sheets.record import Record
+
+from comment_response.group.columns import RecordColumns
+from comment_response.group.recursive_group import comment_count_sort
+from comment_response.group.statistics import (
+    GroupStats,
+    StatisticsIndex,
+    stats_count_sort,
+)
+
+
+def shared_levels(key: tuple[int, ...], previous: tuple[int, ...]) -> int:
+    """Number of leading headings two keys have in common."""
+    level = 0
+    for rank, previous_rank in zip(key, previous):
+        if rank != previous_rank:
+            break
+        level += 1
+    return level
+
+
+def group_records(
+    records: Iterable[Record],
+    sort_cols: list[tuple[int, str]],
+    count_sort: bool = False,
+) -> list[dict]:
+    """Sorting and grouping of records using specified columns."""
+    records = list(records)
+    return group_columns(records, RecordColumns(records, sort_cols), count_sort)
+
+
+def group_columns(
+    records: Sequence[Record],
+    columns: RecordColumns,
+    count_sort: bool = False,
+    statistics: StatisticsIndex | None = None,
+    rows: Iterable[int] | None = None,
+) -> list[dict]:
+    """Grouping of records from their heading columns, or of the records at `rows`
+    only. Nodes hold their statistics under "stats" if a statistics index is
+    given."""
+    return list(iter_group_columns(records, columns, count_sort, statistics, rows))
+
+
+def iter_group_columns(
+    records: Sequence[Record],
+    columns: RecordColumns,
+    count_sort: bool = False,
+    statistics: StatisticsIndex | None = None,
+    rows: Iterable[int] | None = None,
+) -> Iterator[dict]:
+    """Top-level nodes of `group_columns`, each yielded once all of its records are
+    grouped, so earlier nodes can be released while later ones are built."""
+    headings = columns.headings
+    sort_key = comment_count_sort if statistics is None else stats_count_sort
+    last_level = columns.depth - 1
+
+    group = []
+    open_headings: list[dict] = []  # Heading nodes with sub-headings, by level
+    leaf: dict = {}  # Node currently receiving records
+    previous: tuple[int, ...] = ()
+    previous_sort_key = None
+
+    def close(level: int):
+        if leaf:
+            leaf["records"] = tuple(leaf["records"])
+        while len(open_headings) > level:
+            info = open_headings.pop()
+            if statistics is not None:
+                info["stats"] = GroupStats.total(node["stats"] for node in info["data"])
+            if count_sort:
+                info["data"].sort(key=sort_key)
+
+    def new_leaf() -> dict:
+        if statistics is None:
+            return {"records": []}
+        return {"records": [], "stats": GroupStats()}
+
+    sort_keys = columns.sort_keys()
+    if rows is None:
+        rows = range(columns.size)
+    for index in sorted(rows, key=sort_keys.__getitem__):
+        if sort_keys[index] != previous_sort_key:
+            previous_sort_key = sort_keys[index]
+            key = columns.key(index)
+            level = shared_levels(key, previous)
+            close(level)
+            if level == 0:
+                yield from group
+                group.clear()
+            for level, rank in enumerate(key[level:], start=level):
+                heading = headings[level][rank]
+                siblings = open_headings[-1]["data"] if open_headings else group
+                if not heading:
+                    leaf = new_leaf()
+                    siblings.append(leaf)
+                elif level == last_level:
+                    leaf = new_leaf()
+                    node = {"heading": heading, "data": [leaf]}
+                    if statistics is not None:
+                        node["stats"] = leaf["stats"]
+                    siblings.append(node)
+                else:
+                    info = {"heading": heading, "data": []}
+                    siblings.append(info)
+                    open_headings.append(info)
+            previous = key
+        leaf["records"].append(records[index])
+        if statistics is not None:
+            statistics.add_record(leaf["stats"], records[index])
+
+    close(0)
+    yield from group
@@ -0,0 +1,110 @@
+"""
+Select the records of a section.
+
+A `RecordFilter` keeps the records under any of some heading paths, with any of some
+comment tags or commenters, in comment groups with or without a response. Criteria
+left empty keep all records. A `RecordIndex` maps every heading path prefix, tag and
+commenter to row ids (positions in the record list) in a single pass over the records,
+so filters are resolved by intersecting sets of row ids, and only the selected rows
+are grouped and written.
+"""
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+
+from xlsx_rich_text.sheets.record import Record
+
+from comment_response.group.columns import RecordColumns
+from comment_response.group.statistics import cell_text
+
+PATH_SEPARATOR = " > "  # Between the heading titles of a path
+RESPONSE_FILTERS = ("any", "has", "missing")
+
+
+def heading_path(path: str | Iterable[str]) -> tuple[str, ...]:
+    """Heading titles of a path, from the top level, e.g. "Air > Ozone"."""
+    if isinstance(path, str):
+        path = path.split(PATH_SEPARATOR)
+    return tuple(title.strip() for title in path)
+
+
+@dataclass(frozen=True)
+class RecordFilter:
+    headings: frozenset[tuple[str, ...]] = frozenset()
+    tags: frozenset[str] = frozenset()
+    commenters: frozenset[str] = frozenset()
+    response: str = "any"  # "has", "missing" (a response in the comment group)
+
+    def __post_init__(self):
+        if self.response not in RESPONSE_FILTERS:
+            raise ValueError(
+                f"Response filter must be one of {', '.join(RESPONSE_FILTERS)}, "
+                f"not '{self.response}'."
+            )
+
+    @classmethod
+    def from_config(cls, config: dict | None) -> "RecordFilter":
+        """Filter of a `[section.filter]` table (all records if None or empty)."""
+        config = config or {}
+        return cls(
+            headings=frozenset(map(heading_path, config.get("headings", []))),
+            tags=frozenset(map(str, config.get("tags", []))),
+            commenters=frozenset(map(str, config.get("commenters", []))),
+            response=config.get("response", "any"),
+        )
+
+    def __bool__(self):
+        """True if the filter excludes any records."""
+        return bool(
+            self.headings or self.tags or self.commenters or self.response != "any"
+        )
+
+
+class RecordIndex:
+    """Row ids by heading path prefix, tag and commenter, and of comment groups with a
+    response."""
+
+    def __init__(
+        self, records: Sequence[Record], columns: RecordColumns, section_columns: dict
+    ):
+        self.size = len(records)
+        self.paths: dict[tuple[str, ...], set[int]] = {}
+        self.tags: dict[str, set[int]] = {}
+        self.commenters: dict[str, set[int]] = {}
+        groups: dict[tuple[int, ...], list[int]] = {}
+        responded: set[tuple[int, ...]] = set()
+
+        for row, record in enumerate(records):
+            key = columns.key(row)
+            titles = [
+                columns.headings[level][rank].title for level, rank in enumerate(key)
+            ]
+            while titles and not titles[-1]:
+                titles.pop()
+            for length in range(1, len(titles) + 1):
+                self.paths.setdefault(tuple(titles[:length]), set()).add(row)
+            tag = cell_text(record, section_columns["comment_tag"])
+            self.tags.setdefault(tag, set()).add(row)
+            commenter = cell_text(record, section_columns["commenter"])
+            self.commenters.setdefault(commenter, set()).add(row)
+            groups.setdefault(key, []).append(row)
+            if cell_text(record, section_columns["response"]):
+                responded.add(key)
+
+        self.responded = {row for key in responded for row in groups[key]}
+
+    def select(self, query: RecordFilter) -> list[int]:
+        """Row ids of the records matching a filter, in order."""
+        rows = set(range(self.size))
+        for wanted, index in (
+            (query.headings, self.paths),
+            (query.tags, self.tags),
+            (query.commenters, self.commenters),
+        ):
+            if wanted:
+                rows &= set().union(*(index.get(value, ()) for value in wanted))
+        if query.response == "has":
+            rows &= self.responded
+        elif query.response == "missing":
+            rows -= self.responded
+        return sorted(rows)
@@ -0,0 +1,150 @@
+"""
+Statistics of grouped records.
+
+Grouping records with a `StatisticsIndex` stores the statistics of each node of the
+tree under its "stats" key: record count, non-empty comment count, response count,
+distinct commenters and total characters. The count sort, quantity labels and section
+summary read them instead of recounting the records.
+"""
+
+import logging
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from numbers import Number
+
+from xlsx_rich_text.sheets.record import Record
+
+# Approximate document XML bytes per character of text (including the markup of its
+# runs), per comment and per heading, measured on generated workbooks.
+XML_BYTES_PER_CHARACTER = 2.0
+XML_BYTES_PER_COMMENT = 400
+XML_BYTES_PER_HEADING = 160
+
+
+@dataclass(slots=True)
+class GroupStats:
+    records: int = 0
+    comments: int = 0  # Comments with text or a tag, as written
+    responses: int = 0
+    characters: int = 0  # Comment and response text
+    commenters: set[str] = field(default_factory=set)
+
+    def add(self, other: "GroupStats") -> None:
+        self.records += other.records
+        self.comments += other.comments
+        self.responses += other.responses
+        self.characters += other.characters
+        self.commenters |= other.commenters
+
+    @classmethod
+    def total(cls, stats: Iterable["GroupStats"]) -> "GroupStats":
+        result = cls()
+        for item in stats:
+            result.add(item)
+        return result
+
+
+def cell_text(record: Record, column: str) -> str:
+    cell = record.col.get(column)
+    value = cell.value if cell is not None else None
+    if not value:
+        return ""
+    return value.text if hasattr(value, "text") else str(value)
+
+
+class StatisticsIndex:
+    """Computes the statistics of records, from the section columns."""
+
+    def __init__(self, columns: dict):
+        self.comment = columns["comment"]
+        self.comment_tag = columns["comment_tag"]
+        self.commenter = columns["commenter"]
+        self.response = columns["response"]
+
+    def add_record(self, stats: GroupStats, record: Record) -> None:
+        comment = cell_text(record, self.comment)
+        response = cell_text(record, self.response)
+        stats.records += 1
+        if comment or cell_text(record, self.comment_tag):
+            stats.comments += 1
+        if response:
+            stats.responses += 1
+        stats.characters += len(comment) + len(response)
+        commenter = cell_text(record, self.commenter)
+        if commenter:
+            stats.commenters.add(commenter)
+
+
+def stats_count_sort(node: dict) -> Number:
+    """Key function to sort by comment count, like `comment_count_sort`, reading the
+    record count from the node statistics."""
+    if "data" in node:
+        if len(node["data"]) == 1 and "records" in node["data"][0]:
+            return -node["stats"].records
+        return 0
+    return float("-inf")
+
+
+class SectionTotals:
+    """Totals of a grouped section, added one top-level node at a time."""
+
+    def __init__(self):
+        self.stats = GroupStats()
+        self.headings = 0
+        self.groups = 0
+
+    def add(self, node: dict) -> None:
+        self.stats.add(node["stats"])
+        nodes = [node]
+        while nodes:
+            node = nodes.pop()
+            if "records" in node:
+                self.groups += 1
+            else:
+                self.headings += 1
+                nodes.extend(node["data"])
+
+    def track(self, grouped_records: Iterable[dict]) -> Iterator[dict]:
+        """Yield the top-level nodes, adding each one to the totals."""
+        for node in grouped_records:
+            self.add(node)
+            yield node
+
+    def summary(self) -> dict:
+        """Totals, with an estimate of the document XML size."""
+        stats = self.stats
+        return {
+            "records": stats.records,
+            "comments": stats.comments,
+            "responses": stats.responses,
+            "commenters": len(stats.commenters),
+            "characters": stats.characters,
+            "headings": self.headings,
+            "groups": self.groups,
+            "estimated_xml_bytes": round(
+                stats.characters * XML_BYTES_PER_CHARACTER
+                + stats.comments * XML_BYTES_PER_COMMENT
+                + self.headings * XML_BYTES_PER_HEADING
+            ),
+        }
+
+
+def summary(grouped_records: Iterable[dict]) -> dict:
+    """Totals of a grouped section, with an estimate of the document XML size."""
+    totals = SectionTotals()
+    for node in grouped_records:
+        totals.add(node)
+    return totals.summary()
+
+
+def report(grouped_records: Iterable[dict]) -> dict:
+    """Log the summary of a grouped section before it is written."""
+    return log_summary(summary(grouped_records))
+
+
+def log_summary(result: dict) -> dict:
+    logging.info(
+        "Section summary: %s.",
+        ", ".join(f"{name}={value}" for name, value in result.items()),
+    )
+    return result
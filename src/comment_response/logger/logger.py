@@ -3,14 +3,18 @@
 import functools
 import logging
 from pprint import pformat
+from typing import TYPE_CHECKING
 
-from xlsx_rich_text.sheets.newdatasheet import NewDataSheet
+from comment_response.logger.profiler import stage
+
+if TYPE_CHECKING:
+    from xlsx_rich_text.sheets.newdatasheet import NewDataSheet
 
 
 def log(print_console=True):
     def inner(func):
         @functools.wraps(func)
-        def wrapper(sheet: NewDataSheet, **config):
+        def wrapper(sheet: "NewDataSheet", **config):
             logger_start(print_console)
             logging.info(
                 "Reading sheet '%s' from '%s'...", sheet.sheetname, sheet.workbook.file
@@ -33,12 +37,15 @@ def logger_start(print_console=True):
         datefmt=r"%Y-%m-%d %H:%M:%S",
         format=msg_fmt,
     )
-    if print_console:
+    root = logging.getLogger()
+    if print_console and not any(
+        type(handler) is logging.StreamHandler for handler in root.handlers
+    ):
         console = logging.StreamHandler()
         console.setLevel(logging.INFO)
         formatter = logging.Formatter(msg_fmt)
         console.setFormatter(formatter)
-        logging.getLogger().addHandler(console)
+        root.addHandler(console)
     logging.info("Logging initialized.")
 
 
@@ -51,7 +58,8 @@ def log_write(func):
     @functools.wraps(func)
     def wrapper(self, filename, *args, **kwargs):
         logging.info("Writing '%s'...", filename)
-        result = func(self, filename, *args, **kwargs)
+        with stage(func.__qualname__, filename=str(filename)):
+            result = func(self, filename, *args, **kwargs)
         logging.info("Saved '%s'.", filename)
         return result
 
@@ -0,0 +1,161 @@
+"""Stage timing and profiling.
+
+Stages of a run are timed as spans, and counters track the amount of work done
+(records, groups, paragraphs, runs...). Counts made in worker processes are returned
+with their results and added in the parent (see `counters` and `add_counts`). Memory
+peaks are recorded with tracemalloc (optional, as it slows the run) and the peak RSS of
+the process. The tracemalloc peak is process-wide and reset by each stage, so it is
+only recorded for stages of the main thread: stages run in other threads (e.g. sections
+written concurrently by the batch) have no `tracemalloc_peak`. A JSON report is
+written next to `log.log` so runs can be compared between releases.
+"""
+
+import cProfile
+import json
+import logging
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_lock = threading.Lock()
+_local = threading.local()
+_spans: list[dict] = []
+_counters: Counter = Counter()
+_state: dict = {
+    "started": None,
+    "start": None,
+    "config": {},
+    "profile": None,
+}
+
+
+def max_rss() -> int | None:
+    """Peak resident set size of the process, in bytes."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Add to a work counter."""
+    with _lock:
+        _counters[name] += amount
+
+
+def counters() -> Counter:
+    """Copy of the work counters, e.g. to return the counts of a worker process."""
+    with _lock:
+        return Counter(_counters)
+
+
+def add_counts(counts: Counter) -> None:
+    """Add counts made elsewhere (e.g. in a worker process) to the work counters."""
+    with _lock:
+        _counters.update(counts)
+
+
+def start(config: dict | None = None) -> None:
+    """Start profiling a run. Config keys: 'tracemalloc' (trace memory peaks),
+    'cprofile' (path of a cProfile dump) and 'report' (path of the JSON report)."""
+    config = config or {}
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _state.update(
+            started=datetime.now().isoformat(timespec="seconds"),
+            start=time.perf_counter(),
+            config=config,
+            profile=None,
+        )
+    if config.get("tracemalloc") and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    if config.get("cprofile"):
+        _state["profile"] = cProfile.Profile()
+        _state["profile"].enable()
+
+
+@contextmanager
+def stage(name: str, **info):
+    """Time a stage of the run. Nested stages are recorded with their parent."""
+    stack = _local.__dict__.setdefault("stack", [])
+    span = {
+        "name": name,
+        "parent": stack[-1]["name"] if stack else None,
+        "thread": threading.current_thread().name,
+        **info,
+    }
+    stack.append(span)
+    tracing = (
+        tracemalloc.is_tracing()
+        and threading.current_thread() is threading.main_thread()
+    )
+    if tracing:
+        tracemalloc.reset_peak()
+    begin = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["seconds"] = round(time.perf_counter() - begin, 6)
+        span["start"] = round(begin - (_state["start"] or begin), 6)
+        if tracing:
+            peak = max(tracemalloc.get_traced_memory()[1], span.get("_child_peak", 0))
+            span["tracemalloc_peak"] = peak
+            if len(stack) > 1:
+                parent = stack[-2]
+                parent["_child_peak"] = max(parent.get("_child_peak", 0), peak)
+        span.pop("_child_peak", None)
+        span["max_rss"] = max_rss()
+        stack.pop()
+        with _lock:
+            _spans.append(span)
+        logging.info("Stage '%s' took %.3fs.", name, span["seconds"])
+
+
+def report() -> dict:
+    """Timings, counters and memory peaks of the run so far."""
+    elapsed = time.perf_counter() - _state["start"] if _state["start"] else None
+    with _lock:
+        spans = sorted(_spans, key=lambda span: span["start"])
+    return {
+        "started": _state["started"],
+        "seconds": round(elapsed, 6) if elapsed is not None else None,
+        "spans": spans,
+        "counters": dict(counters()),
+        "tracemalloc_peak": (
+            tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        ),
+        "max_rss": max_rss(),
+    }
+
+
+def finish(log_file: str = "log.log") -> dict:
+    """Stop profiling, and write the JSON report (next to the log file, unless
+    configured) and cProfile dump."""
+    config = _state["config"]
+    profile = _state["profile"]
+    if profile is not None:
+        profile.disable()
+        profile.dump_stats(config["cprofile"])
+        logging.info("Saved profile '%s'.", config["cprofile"])
+    result = report()
+    path = Path(config.get("report") or Path(log_file).with_suffix(".json"))
+    path.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    logging.info(
+        "Saved timing report '%s': %s.",
+        path,
+        ", ".join(f"{name}={value}" for name, value in result["counters"].items()),
+    )
+    if tracemalloc.is_tracing() and config.get("tracemalloc"):
+        tracemalloc.stop()
+    return result
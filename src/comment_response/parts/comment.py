@@ -1,20 +1,28 @@
 """Prepare comments"""
 
 import re
+from collections.abc import Hashable
+from functools import cached_property
 from itertools import groupby
+from typing import TYPE_CHECKING
 
-from xlsx_rich_text.cell.richtext import RichText
 from xlsx_rich_text.cell.run import Run
-from xlsx_rich_text.sheets.record import Record
 
+from comment_response.parts.intern import content_key, interned_paragraphs
 from comment_response.parts.paragraph import Paragraph
 
+if TYPE_CHECKING:
+    from xlsx_rich_text.cell.richtext import RichText
+    from xlsx_rich_text.sheets.record import Record
+
+LINE_BREAK = re.compile("(\n)")
+
 
 class Comment:
-    """Prepare comment for writing to docx."""
+    """Prepare comment for writing to docx. Parts are parsed once, on first access."""
 
     def __init__(
-        self, record: Record, column: str, tag_column: str, clean_config: dict
+        self, record: "Record", column: str, tag_column: str, clean_config: dict
     ):
         self.record = record
         self.column: str = column
@@ -28,8 +36,8 @@ class Comment:
             text = bool(self._rich_text.text)
         return text or bool(self.tag)
 
-    @property
-    def _rich_text(self) -> RichText | None:
+    @cached_property
+    def _rich_text(self) -> "RichText | None":
         try:
             text = self.record.col.get(self.column).value
             if text:
@@ -37,18 +45,19 @@ class Comment:
         except AttributeError as exc:
             raise ValueError(f"Column name '{self.column}' not found.") from exc
 
-    @property
-    def runs(self) -> list[Run]:
+    @cached_property
+    def runs(self) -> tuple[Run, ...]:
+        runs = []
         if self._rich_text:
             for run in self._rich_text.runs:
-                run_pieces = re.split("(\n)", run.text)
+                text = run.text
+                run_pieces = LINE_BREAK.split(text) if "\n" in text else (text,)
                 for txt in run_pieces:
                     if txt:
-                        yield Run(txt, run.props)
-        else:
-            return []
+                        runs.append(Run(txt, run.props))
+        return tuple(runs)
 
-    @property
+    @cached_property
     def tag(self) -> str:
         try:
             text = self.record.col.get(self.tag_column).value
@@ -57,12 +66,28 @@ class Comment:
         except AttributeError as exc:
             raise ValueError(f"Column name '{self.tag_column}' not found.") from exc
 
-    @property
-    def paragraphs(self) -> list[Paragraph]:
+    @cached_property
+    def key(self) -> Hashable | None:
+        """Key of the comment text and format (None if empty)."""
+        return content_key(self._rich_text)
+
+    def merge(self, other: "Comment") -> None:
+        """Merge an identical comment: its tag is listed after this comment's tags."""
+        tags = [tag for tag in (self.tag, other.tag) if tag]
+        self.tag = ", ".join(tags) if tags else None
+
+    @cached_property
+    def paragraphs(self) -> tuple[Paragraph, ...]:
+        """Comment paragraphs, shared by identical comments."""
+        return interned_paragraphs(
+            "comment", self._rich_text, self.clean_config, self._split_paragraphs
+        )
+
+    def _split_paragraphs(self) -> tuple[Paragraph, ...]:
         """Group comment runs into paragraphs."""
         paras = []
         keyfunc = lambda run: run.text != "\n"
         for key, runs in groupby(self.runs, key=keyfunc):
             if key:
                 paras.append(Paragraph(list(runs), **self.clean_config))
-        return paras
+        return tuple(paras)
@@ -1,25 +1,37 @@
 """Provides access to grouped record data."""
 
-from xlsx_rich_text.sheets.record import Record
+from collections.abc import Hashable
+from functools import cached_property
+from typing import TYPE_CHECKING
 
+from comment_response.logger.profiler import count
 from comment_response.parts.comment import Comment
 from comment_response.parts.response import Response
 
+if TYPE_CHECKING:
+    from xlsx_rich_text.sheets.record import Record
+
 
 class CommentGroup:
     """Group of comments. There may be one or more comments in a comment group, but
     only one response. If multiple responses are found, they will be grouped into one.
+    Comments and response are built once, on first access.
     """
 
-    def __init__(self, records: list[Record], config: dict):
+    def __init__(self, records: list["Record"], config: dict):
         self.records = records
         self.columns = config["columns"]
         self.clean = config["other"]["clean"]
+        self.collapse = config["other"]["custom"].get("collapse_comments", False)
+        count("groups")
 
-    @property
-    def comments(self) -> list[Comment]:
-        """List of comments. Empty comments are not included."""
+    @cached_property
+    def comments(self) -> tuple[Comment, ...]:
+        """Comments. Empty comments are not included. With 'collapse_comments',
+        identical comments are merged into the first one, listing all of their
+        tags."""
         cmts = []
+        merged: dict[Hashable, Comment] = {}
         for record in self.records:
             cmt = Comment(
                 record,
@@ -27,11 +39,18 @@ class CommentGroup:
                 tag_column=self.columns["comment_tag"],
                 clean_config=self.clean,
             )
-            if cmt:
-                cmts.append(cmt)
-        return cmts
+            if not cmt:
+                continue
+            if self.collapse and cmt.key is not None:
+                if cmt.key in merged:
+                    merged[cmt.key].merge(cmt)
+                    continue
+                merged[cmt.key] = cmt
+            cmts.append(cmt)
+        count("comments", len(cmts))
+        return tuple(cmts)
 
-    @property
+    @cached_property
     def response(self) -> Response:
         """Singular response to comments."""
         return Response(
@@ -0,0 +1,139 @@
+"""Content-addressed interning of parsed cells.
+
+Large dockets repeat the same text in many cells: form-letter comments, and the same
+boilerplate response pasted into many groups. Cells are keyed by their content (text
+and run format properties), so identical cells are parsed and cleaned once and share
+their paragraphs. Writers reuse the output rendered for a shared paragraph.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from comment_response.write.format_adapter import props_key
+
+# Maximum number of distinct cells (and rendered paragraphs) kept.
+INTERN_CACHE_SIZE = 4096
+
+
+def value_key(value) -> str:
+    """Text and format properties of a cell value. Cells read lazily are keyed by a
+    digest of their raw XML, so they are not decoded."""
+    cache_key = getattr(value, "cache_key", None)
+    if cache_key is not None:
+        return cache_key
+    runs = getattr(value, "runs", None)
+    if runs is None:
+        return repr(None if value is None else str(value))
+    return repr([(run.text, props_key(run.props or {})) for run in runs])
+
+
+def content_key(value) -> str | None:
+    """Key of a cell value for interning (`value_key`). None for empty cells."""
+    return value_key(value) if value else None
+
+
+class InternTable:
+    """Values by key, created once and shared, keeping the `maxsize` most recently
+    used values. Temporary limits (see `limit`) lower the size while active."""
+
+    def __init__(self, name: str, maxsize: int = INTERN_CACHE_SIZE):
+        self.name = name
+        self.size = maxsize
+        self.limits: list[int] = []  # Active temporary limits
+        self.values: OrderedDict[Hashable, Any] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, create: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self.values:
+                self.hits += 1
+                self.values.move_to_end(key)
+                return self.values[key]
+        value = create()
+        with self._lock:
+            self.misses += 1
+            self.values[key] = value
+            if len(self.values) > self.maxsize:
+                self.values.popitem(last=False)
+        return value
+
+    @property
+    def maxsize(self) -> int:
+        return min([self.size, *self.limits])
+
+    def _evict(self) -> None:
+        while len(self.values) > self.maxsize:
+            self.values.popitem(last=False)
+
+    def resize(self, maxsize: int) -> None:
+        """Change the maximum size, evicting the least recently used values."""
+        with self._lock:
+            self.size = maxsize
+            self._evict()
+
+    @contextmanager
+    def limit(self, maxsize: int) -> Iterator[None]:
+        """Keep at most `maxsize` values within the context. Limits can overlap (e.g.
+        in threads): the lowest active limit applies, and each one is removed on exit
+        whatever the order."""
+        with self._lock:
+            self.limits.append(maxsize)
+            self._evict()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.limits.remove(maxsize)
+
+    def report(self) -> None:
+        total = self.hits + self.misses
+        if total:
+            logging.info(
+                "Interned %s: %d hits, %d misses (%.1f%% hit rate).",
+                self.name,
+                self.hits,
+                self.misses,
+                100 * self.hits / total,
+            )
+
+
+# Paragraphs of comment and response cells, by content key and clean settings.
+PARAGRAPHS = InternTable("cells")
+# Rendered output of shared paragraphs, by writer and paragraph id. Values hold the
+# paragraph, so ids are never reused while cached.
+RENDERED = InternTable("rendered paragraphs")
+
+
+def interned_paragraphs(
+    kind: str, value, clean_config: dict, parse: Callable[[], tuple]
+) -> tuple:
+    """Paragraphs of a cell, parsed and cleaned once for identical cells."""
+    key = content_key(value)
+    if key is None:
+        return parse()
+    return PARAGRAPHS.get((kind, key, tuple(sorted(clean_config.items()))), parse)
+
+
+def rendered(writer: str, paragraph, render: Callable[[], Any]) -> Any:
+    """Output of a paragraph, rendered once for shared paragraphs."""
+    return RENDERED.get((writer, id(paragraph)), lambda: (paragraph, render()))[1]
+
+
+@contextmanager
+def intern_limit(maxsize: int) -> Iterator[None]:
+    """Keep at most `maxsize` values in each interning table within the context, to
+    bound memory. Cells repeated often enough stay shared."""
+    with PARAGRAPHS.limit(maxsize), RENDERED.limit(maxsize):
+        yield
+
+
+def intern_report() -> None:
+    """Log hit rates of the interning tables."""
+    PARAGRAPHS.report()
+    RENDERED.report()
@@ -3,8 +3,29 @@
 import re
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from xlsx_rich_text.cell.run import Run
+from comment_response.logger.profiler import count
+
+if TYPE_CHECKING:
+    from xlsx_rich_text.cell.run import Run
+
+WHITESPACE = re.compile(r"[^\S\n]+")
+
+
+def clean_texts(texts: list[str], trim: bool = True, clean: bool = True) -> list[str]:
+    """Clean and trim the texts of a paragraph's runs. Spaces are collapsed within
+    each run, never across runs, so each text stays with its run's format."""
+    if not texts:
+        return texts
+    if clean:
+        texts = [WHITESPACE.sub(" ", text) for text in texts]
+    else:
+        texts = list(texts)
+    if trim:
+        texts[0] = texts[0].lstrip()
+        texts[-1] = texts[-1].rstrip()
+    return texts
 
 
 @dataclass
@@ -13,17 +34,21 @@ class Paragraph:
     first run is trimmed of leading whitespace and the last run is trimmed of trailing
     whitespace; 'clean' replaces more than one space with one space."""
 
-    runs: list[Run]
+    runs: list["Run"]
     trim: bool = True
     clean: bool = True
 
     def __post_init__(self):
-        for run in self.runs:
-            if self.clean:
-                run.text = re.sub(r"[^\S\n]+", " ", run.text)
-
-            if self.trim:
-                if run == self.runs[0]:
-                    run.text = run.text.lstrip()
-                if run == self.runs[-1]:
-                    run.text = run.text.rstrip()
+        if not (self.clean or self.trim):
+            return
+        texts = clean_texts([run.text for run in self.runs], self.trim, self.clean)
+        for run, text in zip(self.runs, texts):
+            run.text = text
+
+
+def count_written(paragraph: Paragraph) -> None:
+    """Count a paragraph written to a document, with its runs and formatted runs.
+    Paragraphs shared by identical cells are counted each time they are written."""
+    count("paragraphs")
+    count("runs", len(paragraph.runs))
+    count("formatted runs", sum(1 for run in paragraph.runs if run.props))
@@ -1,26 +1,44 @@
 """Prepare response"""
 
-from xlsx_rich_text.cell.richtext import RichText
-from xlsx_rich_text.sheets.record import Record
+from functools import cached_property, partial
+from typing import TYPE_CHECKING
 
+from comment_response.parts.intern import interned_paragraphs
 from comment_response.parts.paragraph import Paragraph
 
+if TYPE_CHECKING:
+    from xlsx_rich_text.cell.richtext import RichText
+    from xlsx_rich_text.sheets.record import Record
+
 
 class Response:
     """Prepare response for writing to docx."""
 
-    def __init__(self, records: list[Record], response_col: str, clean_config: dict):
+    def __init__(self, records: list["Record"], response_col: str, clean_config: dict):
         self.column = response_col
         self.records = [record for record in records if record.col.get(self.column)]
         self.clean_config = clean_config
 
-    @property
-    def paragraphs(self) -> list[Paragraph]:
+    @cached_property
+    def paragraphs(self) -> tuple[Paragraph, ...]:
+        """Paragraphs of each response cell. Identical cells share their paragraphs."""
         paras = []
         for record in self.records:
             cell = record[self.column]
-            rich_text: RichText = cell.value
+            rich_text: "RichText" = cell.value
             if rich_text:
-                for paragraph in rich_text.paragraphs:
-                    paras.append(Paragraph(paragraph.runs, **self.clean_config))
-        return paras
+                paras.extend(
+                    interned_paragraphs(
+                        "response",
+                        rich_text,
+                        self.clean_config,
+                        partial(self._cell_paragraphs, rich_text),
+                    )
+                )
+        return tuple(paras)
+
+    def _cell_paragraphs(self, rich_text: "RichText") -> tuple[Paragraph, ...]:
+        return tuple(
+            Paragraph(paragraph.runs, **self.clean_config)
+            for paragraph in rich_text.paragraphs
+        )
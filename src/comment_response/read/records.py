@@ -0,0 +1,97 @@
+"""Compact records holding only the cells needed to write the section."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from xlsx_rich_text.cell.run import Run
+
+
+@dataclass(frozen=True, slots=True)
+class CompactParagraph:
+    runs: list[Run]
+
+
+def split_paragraphs(cell_runs: Iterable[Run]) -> list[CompactParagraph]:
+    """Runs split into paragraphs on line breaks. Empty paragraphs are skipped. New
+    runs are returned, so the cell runs are never modified."""
+    paras = []
+    runs = []
+    for run in cell_runs:
+        for piece_no, piece in enumerate(run.text.split("\n")):
+            if piece_no and runs:
+                paras.append(CompactParagraph(runs))
+                runs = []
+            if piece:
+                runs.append(Run(piece, run.props))
+    if runs:
+        paras.append(CompactParagraph(runs))
+    return paras
+
+
+class CompactRichText:
+    """Rich text of a cell, as runs of text with format properties. Keeps the
+    `cache_key` of the reader it was decoded from, if any, so caches key it the same
+    way (e.g. in parallel workers)."""
+
+    __slots__ = ("runs", "cache_key")
+
+    def __init__(self, runs: tuple[Run, ...], cache_key: str | None = None):
+        self.runs = runs
+        self.cache_key = cache_key
+
+    @property
+    def text(self) -> str:
+        return "".join(run.text for run in self.runs)
+
+    @property
+    def paragraphs(self) -> list[CompactParagraph]:
+        return split_paragraphs(self.runs)
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r})"
+
+
+class CompactCell:
+    """Cell value: rich text, a number, a boolean, or None if empty."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: CompactRichText | int | float | bool | None):
+        self.value = value
+
+    def __bool__(self):
+        return bool(str(self))
+
+    def __str__(self):
+        return "" if self.value is None else str(self.value)
+
+    def __int__(self):
+        if self.value is None:
+            return 0
+        if isinstance(self.value, (int, float)):
+            return int(self.value)
+        return int(str(self.value) or 0)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.value!r})"
+
+
+class CompactRecord:
+    """Record of cells, by column name."""
+
+    __slots__ = ("col",)
+
+    def __init__(self, col: dict[str, CompactCell]):
+        self.col = col
+
+    def __getitem__(self, column: str) -> CompactCell:
+        return self.col[column]
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.col!r})"
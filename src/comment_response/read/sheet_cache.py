@@ -0,0 +1,428 @@
+"""On-disk cache of parsed sheets.
+
+A parsed sheet (all columns, rich-text runs and format properties) is saved in a
+compact binary file, keyed by a hash of the workbook contents, the sheet name and the
+header row. Later runs load it by memory-mapping the file, without opening the xlsx
+package, so only changing the configuration (sort, intros...) does not parse the
+workbook again. Entries for older versions of the same workbook sheet are removed when
+a new one is saved, after closing their mapping if it is still open (the cells read from
+it are detached first, so they stay readable).
+
+File layout: a magic number, the length of a JSON metadata block, the metadata
+(header, format properties and the offset of each section), then 8-byte aligned array
+sections: the string table (offsets and UTF-8 data), runs (string, props), values, the
+cache key of each value (a string, as computed by the stream reader) and the cells of
+each row.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import weakref
+from array import array
+from collections.abc import Iterable
+from functools import cached_property
+from pathlib import Path
+
+from xlsx_rich_text.cell.run import Run
+
+from comment_response.read.records import (
+    CompactCell,
+    CompactParagraph,
+    CompactRecord,
+    CompactRichText,
+    split_paragraphs,
+)
+from comment_response.read.xlsx import StreamingWorkbook
+
+MAGIC = b"CRSHEET2"
+LENGTH = struct.Struct("<Q")
+HASH_CHUNK_SIZE = 2**20
+
+# Sheets are opened before logging is set up: the root logger would be configured early
+logger = logging.getLogger(__name__)
+
+# Value kinds
+NUMBER, BOOLEAN, RICH_TEXT = 0, 1, 2
+NO_VALUE = -1
+NO_PROPS = -1
+
+
+def file_hash(path: str | Path) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Open sheet data, to close the mappings of stale files before removing them
+_mapped: "weakref.WeakSet[SheetData]" = weakref.WeakSet()
+
+
+class SheetData:
+    """Arrays of a cached sheet, read from a memory-mapped file. The mapping is closed
+    by `close` (or on exit of a `with` block), after detaching the rich text read
+    from it."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.texts: "weakref.WeakSet[CachedRichText]" = weakref.WeakSet()
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        self._views = [view]
+        if view[: len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' is not a sheet cache file of this version.")
+        try:
+            sections = self._read_sections(view)
+        except (KeyError, TypeError, ValueError, struct.error) as error:
+            # e.g. a truncated file, left by an interrupted write
+            self.close()
+            raise ValueError(f"'{path}' is a corrupt sheet cache file.") from error
+        self.string_offsets = sections["string_offsets"]
+        self.string_data = sections["string_data"]
+        self.runs = sections["runs"]
+        self.values = sections["values"]
+        self.keys = sections["keys"]
+        self.numbers = sections["numbers"]
+        self.rows = sections["rows"]
+        self.cells = sections["cells"]
+        _mapped.add(self)
+
+    def _read_sections(self, view: memoryview) -> dict[str, memoryview]:
+        """Read the metadata, and the arrays it lists by name."""
+        start = len(MAGIC) + LENGTH.size
+        (length,) = LENGTH.unpack_from(view, len(MAGIC))
+        self.meta = json.loads(bytes(view[start : start + length]))
+        self.props: list[dict] = self.meta["props"]
+        sections = {}
+        for name, (offset, size, typecode) in self.meta["sections"].items():
+            section = view[offset : offset + size]
+            self._views.append(section)
+            if len(section) != size:
+                raise ValueError(f"Section '{name}' is truncated.")
+            if typecode != "B":
+                section = section.cast(typecode)
+                self._views.append(section)
+            sections[name] = section
+        return sections
+
+    @property
+    def closed(self) -> bool:
+        return self._map.closed
+
+    def close(self) -> None:
+        """Detach the rich text read from the cache, then close the mapping."""
+        if self.closed:
+            return
+        for text in list(self.texts):
+            text.detach()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._map.close()
+        _mapped.discard(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def text(self, value: int) -> "CachedRichText":
+        text = CachedRichText(self, value)
+        self.texts.add(text)
+        return text
+
+    def string(self, index: int) -> str:
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return str(self.string_data[start:end], "utf-8")
+
+    def run_props(self, run: int) -> dict | None:
+        props = self.runs[run * 2 + 1]
+        return None if props == NO_PROPS else self.props[props]
+
+    def run_range(self, value: int) -> range:
+        _, start, count = self.values[value * 3 : value * 3 + 3]
+        return range(start, start + count)
+
+    def cache_key(self, value: int) -> str | None:
+        key = self.keys[value]
+        return None if key == NO_VALUE else self.string(key)
+
+
+class CachedRichText:
+    """Rich text of a cached cell. Text and runs are read from the cache on first
+    access, and keep the `cache_key` of the reader that parsed the sheet. Pickles as
+    `CompactRichText` (e.g. for parallel rendering)."""
+
+    __slots__ = ("_data", "_value", "_text", "_runs", "_cache_key", "__weakref__")
+
+    def __init__(self, data: SheetData, value: int):
+        self._data = data
+        self._value = value
+        self._text = None
+        self._runs = None
+        self._cache_key = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            data = self._data
+            self._text = "".join(
+                data.string(data.runs[run * 2]) for run in data.run_range(self._value)
+            )
+        return self._text
+
+    @property
+    def runs(self) -> tuple[Run, ...]:
+        if self._runs is None:
+            data = self._data
+            self._runs = tuple(
+                Run(data.string(data.runs[run * 2]), data.run_props(run))
+                for run in data.run_range(self._value)
+            )
+        return self._runs
+
+    @property
+    def cache_key(self) -> str | None:
+        if self._cache_key is None and self._data is not None:
+            self._cache_key = self._data.cache_key(self._value)
+        return self._cache_key
+
+    def detach(self) -> None:
+        """Read the text, runs and key from the cache, so the cache can be closed."""
+        _ = self.text, self.runs, self.cache_key
+        self._data = None
+
+    def release(self) -> None:
+        """Drop the text and runs read from the cache (read again on next access),
+        unless detached from it."""
+        if self._data is not None:
+            self._text = None
+            self._runs = None
+
+    @property
+    def paragraphs(self) -> list[CompactParagraph]:
+        return split_paragraphs(self.runs)
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r})"
+
+    def __reduce__(self):
+        return CompactRichText, (self.runs, self.cache_key)
+
+
+class CachedSheet:
+    """Sheet records loaded from the cache, keeping only the requested columns (all
+    columns if None)."""
+
+    def __init__(
+        self,
+        workbook: StreamingWorkbook,
+        sheetname: str,
+        data: SheetData,
+        columns: Iterable[str] | None = None,
+    ):
+        self.workbook = workbook
+        self.sheetname = sheetname
+        self.header_row = data.meta["header_row"]
+        self.data = data
+        self.columns = None if columns is None else set(columns) - {""}
+
+    @cached_property
+    def header(self) -> dict[int, str]:
+        """Column names, by column index."""
+        return {int(index): name for index, name in self.data.meta["header"].items()}
+
+    def value(self, value: int):
+        if value == NO_VALUE:
+            return None
+        kind, number, _ = self.data.values[value * 3 : value * 3 + 3]
+        if kind == NUMBER:
+            number = self.data.numbers[number]
+            return int(number) if number.is_integer() else number
+        if kind == BOOLEAN:
+            return bool(number)
+        return self.data.text(value)
+
+    @cached_property
+    def records(self) -> dict[int, CompactRecord]:
+        """Records after the header row, by row number."""
+        data = self.data
+        width = len(self.header)
+        kept = [
+            (position, name)
+            for position, name in enumerate(self.header.values())
+            if self.columns is None or name in self.columns
+        ]
+        values = {}
+        records = {}
+        for row_no, row_number in enumerate(data.rows):
+            row = data.cells[row_no * width : row_no * width + width]
+            if not any(row[position] != NO_VALUE for position, _ in kept):
+                continue
+            col = {}
+            for position, name in kept:
+                value = row[position]
+                if value not in values:
+                    values[value] = self.value(value)
+                col[name] = CompactCell(values[value])
+            records[row_number] = CompactRecord(col)
+        return records
+
+
+class SheetWriter:
+    """Builds the arrays of a parsed sheet."""
+
+    def __init__(self):
+        self.strings: dict[str, int] = {}
+        self.props: dict[str, int] = {}
+        self.string_offsets = array("q", [0])
+        self.string_data = bytearray()
+        self.runs = array("i")
+        self.values = array("i")
+        self.keys = array("i")  # Cache key (string) of each value
+        self.numbers = array("d")
+        self.value_ids: dict[int, int] = {}  # Value ids, by id() of parsed values
+
+    def string(self, text: str) -> int:
+        if text not in self.strings:
+            self.strings[text] = len(self.strings)
+            self.string_data += text.encode("utf-8")
+            self.string_offsets.append(len(self.string_data))
+        return self.strings[text]
+
+    def prop(self, props: dict | None) -> int:
+        if props is None:
+            return NO_PROPS
+        key = json.dumps(props, sort_keys=True)
+        return self.props.setdefault(key, len(self.props))
+
+    def value(self, value) -> int:
+        if value is None:
+            return NO_VALUE
+        if id(value) in self.value_ids:
+            return self.value_ids[id(value)]
+        key = getattr(value, "cache_key", None)
+        self.keys.append(NO_VALUE if key is None else self.string(key))
+        if isinstance(value, bool):
+            entry = (BOOLEAN, int(value), 0)
+        elif isinstance(value, (int, float)):
+            self.numbers.append(value)
+            entry = (NUMBER, len(self.numbers) - 1, 0)
+        else:
+            start = len(self.runs) // 2
+            for run in value.runs:
+                self.runs.extend((self.string(run.text), self.prop(run.props)))
+            entry = (RICH_TEXT, start, len(self.runs) // 2 - start)
+        self.values.extend(entry)
+        self.value_ids[id(value)] = len(self.values) // 3 - 1
+        return self.value_ids[id(value)]
+
+    def save(self, path: Path, sheet) -> None:
+        """Save the header and records of a parsed sheet (all columns)."""
+        header = sheet.header
+        rows = array("q")
+        cells = array("i")
+        for row_number, record in sheet.records.items():
+            rows.append(row_number)
+            for name in header.values():
+                cell = record.col.get(name)
+                cells.append(self.value(cell.value if cell is not None else None))
+
+        sections = {
+            "string_offsets": self.string_offsets,
+            "string_data": self.string_data,
+            "runs": self.runs,
+            "values": self.values,
+            "keys": self.keys,
+            "numbers": self.numbers,
+            "rows": rows,
+            "cells": cells,
+        }
+        meta = {
+            "header_row": sheet.header_row,
+            "header": {str(index): name for index, name in header.items()},
+            "props": [json.loads(props) for props in self.props],
+            "sections": {},
+        }
+        # Section offsets depend on the metadata length, which depends on the offsets:
+        # lay out the sections after a metadata block padded to a fixed size.
+        blobs = {name: bytes(section) for name, section in sections.items()}
+        meta_size = len(json.dumps(meta)) + 64 * (len(blobs) + 1)
+        offset = align(len(MAGIC) + LENGTH.size + meta_size)
+        for name, section in sections.items():
+            typecode = section.typecode if isinstance(section, array) else "B"
+            meta["sections"][name] = [offset, len(blobs[name]), typecode]
+            offset = align(offset + len(blobs[name]))
+        meta_json = json.dumps(meta).encode("utf-8")
+        if len(meta_json) > meta_size:
+            raise ValueError("Sheet cache metadata is larger than expected.")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix=".tmp", delete=False
+        ) as file:
+            file.write(MAGIC + LENGTH.pack(len(meta_json)) + meta_json)
+            for name, blob in blobs.items():
+                file.seek(meta["sections"][name][0])
+                file.write(blob)
+        os.replace(file.name, path)
+
+
+def align(offset: int) -> int:
+    return (offset + 7) // 8 * 8
+
+
+class SheetCache:
+    """Cache of parsed sheets in `directory`."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+
+    def _paths(self, file: str, sheetname: str, header_row: int) -> tuple[Path, str]:
+        """Cache path of a sheet of the current workbook contents, and the prefix of
+        the cache paths of all its versions."""
+        source = json.dumps([os.path.abspath(file), sheetname, header_row])
+        prefix = hashlib.blake2b(source.encode(), digest_size=8).hexdigest()
+        return self.directory / f"{prefix}-{file_hash(file)}.sheet", prefix
+
+    def sheet(
+        self,
+        workbook: StreamingWorkbook,
+        sheetname: str,
+        header_row: int = 1,
+        columns: Iterable[str] | None = None,
+    ):
+        """Sheet loaded from the cache, or parsed and saved to the cache."""
+        path, prefix = self._paths(workbook.file, sheetname, header_row)
+        if path.exists():
+            logger.info("Loading sheet '%s' from cache '%s'.", sheetname, path)
+            try:
+                return CachedSheet(workbook, sheetname, SheetData(path), columns)
+            except ValueError as error:
+                logger.info("%s Parsing the sheet again.", error)
+
+        sheet = workbook.sheet(sheetname, header_row)
+        SheetWriter().save(path, sheet)
+        for stale in self.directory.glob(f"{prefix}-*.sheet"):
+            if stale != path:
+                # Files cannot be removed while mapped on Windows
+                for data in [data for data in _mapped if data.path == stale]:
+                    data.close()
+                stale.unlink(missing_ok=True)
+        logger.info("Saved sheet '%s' to cache '%s'.", sheetname, path)
+        return CachedSheet(workbook, sheetname, SheetData(path), columns)
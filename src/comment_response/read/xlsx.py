@@ -0,0 +1,395 @@
+"""Stream records from an xlsx sheet.
+
+The sheet XML is read row by row with `iterparse`, keeping only the columns needed to
+write the section. Shared strings are read only for the cells that are kept, and their
+runs are decoded lazily: the plain text (for emptiness checks, headings and automark)
+is read without decoding run properties, which are decoded when a group is rendered.
+"""
+
+import hashlib
+import re
+import threading
+import zipfile
+from collections.abc import Iterable, Iterator
+from functools import cached_property, lru_cache
+from posixpath import join, normpath
+
+from lxml import etree
+from xlsx_rich_text.cell.run import Run
+
+from comment_response.read.records import (
+    CompactCell,
+    CompactParagraph,
+    CompactRecord,
+    CompactRichText,
+    split_paragraphs,
+)
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+ROW = f"{{{MAIN_NS}}}row"
+CELL = f"{{{MAIN_NS}}}c"
+VALUE = f"{{{MAIN_NS}}}v"
+INLINE_STRING = f"{{{MAIN_NS}}}is"
+STRING_ITEM = f"{{{MAIN_NS}}}si"
+TEXT = f"{{{MAIN_NS}}}t"
+RICH_RUN = f"{{{MAIN_NS}}}r"
+RUN_PROPS = f"{{{MAIN_NS}}}rPr"
+
+# Text of a plain string, or of the runs of a rich string (phonetic runs excluded).
+STRING_TEXTS = etree.XPath("m:t/text() | m:r/m:t/text()", namespaces={"m": MAIN_NS})
+
+ESCAPED_CHAR = re.compile(r"_x([0-9A-Fa-f]{4})_")
+CELL_COLUMN = re.compile(r"[A-Z]+")
+
+RUN_PROPS_CACHE_SIZE = 4096  # Distinct run formats kept decoded
+
+RawCell = tuple[str, str | None, int]
+
+
+def local_name(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def unescape(text: str | None) -> str:
+    """Decode `_xHHHH_` escaped characters (e.g. `_x000D_`)."""
+    if not text:
+        return ""
+    if "_x" not in text:
+        return text
+    return ESCAPED_CHAR.sub(lambda match: chr(int(match[1], 16)), text)
+
+
+def column_index(ref: str) -> int:
+    """Zero-based column index of a cell reference, e.g. 'AB12' -> 27."""
+    index = 0
+    for char in CELL_COLUMN.match(ref)[0]:
+        index = index * 26 + ord(char) - 64
+    return index - 1
+
+
+def element_props(element) -> dict[str, dict[str, str]]:
+    """Format properties of a font or run properties element."""
+    return {
+        local_name(child.tag): {local_name(k): v for k, v in child.attrib.items()}
+        for child in element
+        if isinstance(child.tag, str)
+    }
+
+
+@lru_cache(maxsize=RUN_PROPS_CACHE_SIZE)
+def props_from_items(items: tuple[tuple[str, tuple], ...]) -> dict[str, dict[str, str]]:
+    return {
+        local_name(tag): {local_name(k): v for k, v in attrib} for tag, attrib in items
+    }
+
+
+def run_props(element) -> dict[str, dict[str, str]]:
+    """Format properties of run properties element. Runs with the same properties
+    share a dictionary, which must not be modified."""
+    return props_from_items(
+        tuple(
+            (child.tag, tuple(child.attrib.items()))
+            for child in element
+            if isinstance(child.tag, str)
+        )
+    )
+
+
+def decode_runs(element, font: dict | None = None) -> tuple[Run, ...]:
+    """Runs of a shared string item or inline string. Runs without their own format
+    properties take the cell font."""
+    plain = element.find(TEXT)
+    if plain is not None:
+        return (Run(unescape(plain.text), font or {}),)
+    runs = []
+    for run in element.iterfind(RICH_RUN):
+        props = run.find(RUN_PROPS)
+        text = unescape(run.findtext(TEXT))
+        props = run_props(props) if props is not None else font or {}
+        runs.append(Run(text, props))
+    return tuple(runs)
+
+
+def string_text(element) -> str:
+    """Plain text of a shared string item or inline string."""
+    return "".join(map(unescape, STRING_TEXTS(element)))
+
+
+class LazyRichText:
+    """Rich text of a string item, decoded into runs on first access to `runs` or
+    `paragraphs`. The text is read without decoding the runs. Pickles as decoded
+    `CompactRichText` with the same `cache_key` (e.g. for parallel rendering)."""
+
+    __slots__ = ("_element", "_font", "_text", "_runs", "_cache_key")
+
+    def __init__(self, element, font: dict | None = None):
+        self._element = element
+        self._font = font
+        self._text = None
+        self._runs = None
+        self._cache_key = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = string_text(self._element)
+        return self._text
+
+    @property
+    def runs(self) -> tuple[Run, ...]:
+        if self._runs is None:
+            self._runs = decode_runs(self._element, self._font)
+        return self._runs
+
+    @property
+    def paragraphs(self) -> list[CompactParagraph]:
+        return split_paragraphs(self.runs)
+
+    @property
+    def cache_key(self) -> str:
+        """Key of the text and formatting: a digest of the raw string item, so keys
+        kept by caches stay small."""
+        if self._cache_key is None:
+            raw = repr((etree.tostring(self._element), self._font))
+            self._cache_key = hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+        return self._cache_key
+
+    def release(self) -> None:
+        """Drop the decoded text and runs (decoded again on next access)."""
+        self._text = None
+        self._runs = None
+        self._cache_key = None
+
+    def __bool__(self):
+        return bool(self.text)
+
+    def __str__(self):
+        return self.text
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.text!r})"
+
+    def __reduce__(self):
+        return CompactRichText, (self.runs, self.cache_key)
+
+
+def iter_rows(source) -> Iterator[tuple[int, Iterator]]:
+    """Iterate over (row number, cell elements) of a worksheet, releasing each row
+    once processed."""
+    row_number = 0
+    for _, row in etree.iterparse(source, events=("end",), tag=ROW):
+        row_number = int(row.get("r", row_number + 1))
+        yield row_number, row.iterchildren(CELL)
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+
+def iter_cells(
+    cells: Iterable, columns: set[int] | None = None
+) -> Iterator[tuple[int, RawCell]]:
+    """Iterate over (column index, (type, raw value, style)) of non-empty cells in the
+    requested columns (all columns if None)."""
+    index = -1
+    for cell in cells:
+        ref = cell.get("r")
+        index = column_index(ref) if ref else index + 1
+        if columns is not None and index not in columns:
+            continue
+        cell_type = cell.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = cell.find(INLINE_STRING)
+            if inline is None:
+                continue
+            raw = etree.tostring(inline)
+        else:
+            raw = cell.findtext(VALUE)
+            if raw is None:
+                continue
+        yield index, (cell_type, raw, int(cell.get("s", 0)))
+
+
+class StreamingWorkbook:
+    """Workbook read directly from the xlsx package."""
+
+    def __init__(self, file: str):
+        self.file = file
+        self._strings: dict[int, etree._Element] = {}
+        self._strings_lock = threading.Lock()
+
+    def _open(self, archive: zipfile.ZipFile, path: str):
+        return archive.open(path.lstrip("/"))
+
+    @cached_property
+    def sheet_paths(self) -> dict[str, str]:
+        """Package path of each worksheet, by sheet name."""
+        with zipfile.ZipFile(self.file) as archive:
+            rels = etree.parse(self._open(archive, "xl/_rels/workbook.xml.rels"))
+            targets = {
+                rel.get("Id"): rel.get("Target")
+                for rel in rels.iterfind(f"{{{PKG_REL_NS}}}Relationship")
+            }
+            workbook = etree.parse(self._open(archive, "xl/workbook.xml"))
+        paths = {}
+        for sheet in workbook.iterfind(f".//{{{MAIN_NS}}}sheet"):
+            target = targets[sheet.get(f"{{{REL_NS}}}id")]
+            if target.startswith("/"):
+                paths[sheet.get("name")] = target.lstrip("/")
+            else:
+                paths[sheet.get("name")] = normpath(join("xl", target))
+        return paths
+
+    @cached_property
+    def cell_fonts(self) -> list[dict]:
+        """Font properties of each cell style."""
+        with zipfile.ZipFile(self.file) as archive:
+            if "xl/styles.xml" not in archive.namelist():
+                return []
+            styles = etree.parse(self._open(archive, "xl/styles.xml"))
+        fonts = [
+            element_props(font)
+            for font in styles.iterfind(f"{{{MAIN_NS}}}fonts/{{{MAIN_NS}}}font")
+        ]
+        return [
+            fonts[int(xf.get("fontId", 0))] if fonts else {}
+            for xf in styles.iterfind(f"{{{MAIN_NS}}}cellXfs/{{{MAIN_NS}}}xf")
+        ]
+
+    def cell_font(self, style: int) -> dict:
+        fonts = self.cell_fonts
+        return fonts[style] if style < len(fonts) else {}
+
+    def shared_strings(self, indices: set[int]) -> dict[int, etree._Element]:
+        """Shared string items at the requested indices. Items are kept, so sheets of
+        the same workbook share them; the shared strings are only read again for
+        missing items, and reading stops after the last missing item."""
+        with self._strings_lock:
+            missing = indices - self._strings.keys()
+            if missing:
+                self._strings.update(self._read_shared_strings(missing))
+            strings = self._strings
+            return {index: strings[index] for index in indices if index in strings}
+
+    def _read_shared_strings(self, indices: set[int]) -> dict[int, etree._Element]:
+        strings = {}
+        last = max(indices)
+        with zipfile.ZipFile(self.file) as archive:
+            if "xl/sharedStrings.xml" not in archive.namelist():
+                return strings
+            with self._open(archive, "xl/sharedStrings.xml") as source:
+                for index, (_, item) in enumerate(
+                    etree.iterparse(source, events=("end",), tag=STRING_ITEM)
+                ):
+                    if index in indices:
+                        strings[index] = item
+                    else:
+                        item.clear()
+                    if index >= last:
+                        break
+        return strings
+
+    def sheet(
+        self, sheetname: str, header_row: int = 1, columns: Iterable[str] | None = None
+    ) -> "StreamingSheet":
+        return StreamingSheet(self, sheetname, header_row, columns)
+
+
+class StreamingSheet:
+    """Sheet records, keeping only the requested columns (all columns if None)."""
+
+    def __init__(
+        self,
+        workbook: StreamingWorkbook,
+        sheetname: str,
+        header_row: int = 1,
+        columns: Iterable[str] | None = None,
+    ):
+        if sheetname not in workbook.sheet_paths:
+            raise ValueError(f"Sheet '{sheetname}' not found in '{workbook.file}'.")
+        self.workbook = workbook
+        self.sheetname = sheetname
+        self.header_row = header_row
+        self.columns = None if columns is None else set(columns) - {""}
+
+    def _rows(
+        self, columns: set[int] | None = None
+    ) -> Iterator[tuple[int, dict[int, RawCell]]]:
+        with zipfile.ZipFile(self.workbook.file) as archive:
+            path = self.workbook.sheet_paths[self.sheetname]
+            with self.workbook._open(archive, path) as source:
+                for row_number, cells in iter_rows(source):
+                    yield row_number, dict(iter_cells(cells, columns))
+
+    def value(self, raw_cell: RawCell | None, strings: dict):
+        """Cell value: rich text for strings, a number, or None for empty cells."""
+        if raw_cell is None:
+            return None
+        cell_type, raw, style = raw_cell
+        font = self.workbook.cell_font(style)
+        match cell_type:
+            case "s":
+                return LazyRichText(strings[int(raw)], font)
+            case "inlineStr":
+                return LazyRichText(etree.fromstring(raw), font)
+            case "str" | "e":
+                return CompactRichText((Run(unescape(raw), font),))
+            case "b":
+                return raw == "1"
+            case _:
+                number = float(raw)
+                return int(number) if number.is_integer() else number
+
+    @cached_property
+    def header(self) -> dict[int, str]:
+        """Column names, by column index."""
+        rows = self._rows()
+        try:
+            cells = next(
+                (cells for row_number, cells in rows if row_number == self.header_row),
+                None,
+            )
+        finally:
+            rows.close()
+        if cells is None:
+            raise ValueError(f"Header row {self.header_row} not found.")
+        strings = self.workbook.shared_strings(
+            {int(raw) for cell_type, raw, _ in cells.values() if cell_type == "s"}
+        )
+        return {index: str(self.value(cell, strings)) for index, cell in cells.items()}
+
+    @cached_property
+    def records(self) -> dict[int, CompactRecord]:
+        """Records after the header row, by row number, read in a single pass. Rows
+        without a value in any of the kept columns are skipped."""
+        kept = {
+            index: name
+            for index, name in self.header.items()
+            if self.columns is None or name in self.columns
+        }
+        rows = {}
+        for row_number, cells in self._rows(set(kept)):
+            if row_number > self.header_row and cells:
+                rows[row_number] = tuple(cells.get(index) for index in kept)
+
+        strings = self.workbook.shared_strings(
+            {
+                int(cell[1])
+                for row in rows.values()
+                for cell in row
+                if cell and cell[0] == "s"
+            }
+        )
+        values = {None: None}
+        names = tuple(kept.values())
+        records = {}
+        for row_number, row in rows.items():
+            for cell in row:
+                if cell not in values:
+                    values[cell] = self.value(cell, strings)
+            records[row_number] = CompactRecord(
+                {name: CompactCell(values[cell]) for name, cell in zip(names, row)}
+            )
+        return records
@@ -1,48 +1,317 @@
 """Comment section"""
 
+from collections.abc import Iterable, Iterator
+from functools import cached_property
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-import docx
-from docx.document import Document
-from xlsx_rich_text.sheets.newdatasheet import NewDataSheet
-
-from comment_response.group.recursive_group import group_records
+from comment_response.group.columns import RecordColumns
+from comment_response.group.index_group import (
+    group_columns,
+    iter_group_columns,
+)
+from comment_response.group.query import RecordFilter, RecordIndex
 from comment_response.group.sort_records import SortRecords
+from comment_response.group.statistics import (
+    SectionTotals,
+    StatisticsIndex,
+    log_summary,
+    report,
+    summary,
+)
 from comment_response.logger.logger import log, log_write
+from comment_response.logger.profiler import count, stage
+from comment_response.parts.intern import intern_report
+from comment_response.write import ooxml
 from comment_response.write.automark import AutoMark
+from comment_response.write.cache import FragmentCache
 from comment_response.write.docx import recursive_write
-from comment_response.write.styles import create_style
+from comment_response.write.format_adapter import cache_report
+from comment_response.write.package import DEFAULT_COMPRESSION, save_document
+from comment_response.write.shards import (
+    remove_stale_shards,
+    shard_path,
+    split_shards,
+    write_manifest,
+)
+from comment_response.write.templates import (
+    SECTION_STYLES,
+    template_document,
+    template_package,
+)
+
+if TYPE_CHECKING:
+    from xlsx_rich_text.sheets.newdatasheet import NewDataSheet
+
+
+def required_columns(config: dict) -> list[str]:
+    """Columns read from the sheet to write the section and automark."""
+    sort = SortRecords(config["sort"])
+    return [*config["columns"].values(), *sort.title, *sort.ordered]
+
+
+def check_writer(
+    writer: str, workers: int, cache: FragmentCache | None, pipeline: bool
+) -> None:
+    """Raise ValueError for unknown writers, or options the writer does not support."""
+    if writer not in ("docx", "stream", "spool"):
+        raise ValueError(f"Unknown writer '{writer}'.")
+    if writer == "docx" and (workers != 1 or cache is not None or pipeline):
+        raise ValueError(
+            "Parallel rendering, caching and pipelining require the 'stream' writer."
+        )
+    if writer == "spool" and (workers != 1 or pipeline):
+        raise ValueError(
+            "Parallel rendering and pipelining require the 'stream' writer."
+        )
+
+
+def check_exports(exports: dict | None, workers: int, pipeline: bool) -> None:
+    """Raise ValueError for exports with options they do not support."""
+    if exports and (workers != 1 or pipeline):
+        raise ValueError(
+            "Exports are written in a single pass with the section, without "
+            "parallel rendering or pipelining."
+        )
 
 
 @log()
 class Section:
     """Write comment-response section to docx."""
 
-    def __init__(self, sheet: NewDataSheet, **config):
+    def __init__(self, sheet: "NewDataSheet", **config):
         self.sheet = sheet
         self.sheetname: str = sheet.sheetname
         self.config: dict = config
         self.sort = SortRecords(config["sort"])
+        self.query = RecordFilter.from_config(config.get("filter"))
 
-    @property
+    @cached_property
     def records(self):
-        return list(self.sheet.records.values())
+        """Sheet records, read once for both the section and automark."""
+        with stage("read records", sheet=self.sheetname):
+            records = list(self.sheet.records.values())
+        count("records", len(records))
+        return records
+
+    @cached_property
+    def columns(self) -> RecordColumns:
+        """Heading columns of the records, read once for grouping."""
+        records = self.records
+        with stage("read heading columns", sheet=self.sheetname):
+            return RecordColumns(records, self.sort.key())
+
+    @cached_property
+    def index(self) -> RecordIndex:
+        """Row ids of the records by heading path, tag and commenter, built once."""
+        columns = self.columns
+        with stage("index records", sheet=self.sheetname):
+            return RecordIndex(self.records, columns, self.config["columns"])
+
+    @cached_property
+    def selected(self) -> list[int] | None:
+        """Row ids of the records matching the section filter (None for all)."""
+        if not self.query:
+            return None
+        rows = self.index.select(self.query)
+        count("selected records", len(rows))
+        return rows
 
     def section_data(self):
-        return group_records(self.records, self.sort.key(), self.sort.by_count)
+        columns = self.columns
+        selected = self.selected
+        with stage("group records", sheet=self.sheetname):
+            return group_columns(
+                self.records,
+                columns,
+                self.sort.by_count,
+                StatisticsIndex(self.config["columns"]),
+                selected,
+            )
+
+    def iter_section_data(self) -> Iterator[dict]:
+        """Top-level nodes of `section_data`, grouped one at a time."""
+        return iter_group_columns(
+            self.records,
+            self.columns,
+            self.sort.by_count,
+            StatisticsIndex(self.config["columns"]),
+            self.selected,
+        )
+
+    def summary(self) -> dict:
+        """Totals of the grouped section (records, comments, responses, commenters,
+        characters, headings and groups), with an estimate of the document size."""
+        return summary(self.section_data())
+
+    @log_write
+    def write(
+        self,
+        filename: str = "output/section.docx",
+        outline_level: int = 1,
+        writer: str = "docx",
+        workers: int = 1,
+        cache: FragmentCache | None = None,
+        pipeline: bool = False,
+        compression: int = DEFAULT_COMPRESSION,
+        template_cache: str | Path | None = None,
+        exports: dict[str, str] | None = None,
+    ):
+        """Write section using the 'docx' (python-docx), 'stream' (direct OOXML) or
+        'spool' (direct OOXML, one top-level group in memory at a time) writer. With
+        the 'stream' writer, top-level groups can be rendered in parallel by more than
+        one worker process (0 for one per CPU), and a single worker can render in a
+        thread pipelined with saving. With either OOXML writer, unchanged comment
+        groups can be reused from a fragment cache. The package is saved at the given
+        compression level (0 to store parts uncompressed). The styled template is read
+        from the `template_cache` directory, if given, once it has been built.
+
+        `exports` maps more save locations to export formats ('html', 'markdown',
+        'jsonl' or 'docx'), written in the same pass as the section, from the same
+        grouped and parsed comment groups."""
+        check_writer(writer, workers, cache, pipeline)
+        check_exports(exports, workers, pipeline)
+        if writer == "spool" or exports:
+            totals = SectionTotals()
+            data = totals.track(self.iter_section_data())
+        else:
+            data = self.section_data()
+            report(data)
+        if exports:
+            from comment_response.write.export import ExportOptions, export_section
+
+            export_section(
+                {filename: "docx", **exports},
+                data,
+                self.config,
+                outline_level,
+                ExportOptions(writer, cache, compression, template_cache),
+            )
+        else:
+            self._write_data(
+                filename,
+                data,
+                outline_level,
+                writer,
+                workers,
+                cache,
+                pipeline,
+                compression,
+                template_cache,
+            )
+        if writer == "spool" or exports:
+            log_summary(totals.summary())
+        if cache is not None:
+            cache.prune()
+            cache.report()
+        cache_report()
+        intern_report()
 
     @log_write
-    def write(self, filename: str = "output/section.docx", outline_level: int = 1):
-        doc: Document = docx.Document()
+    def write_shards(
+        self,
+        filename: str = "output/section.docx",
+        outline_level: int = 1,
+        shard_groups: int = 0,
+        writer: str = "docx",
+        workers: int = 1,
+        cache: FragmentCache | None = None,
+        pipeline: bool = False,
+        compression: int = DEFAULT_COMPRESSION,
+        template_cache: str | Path | None = None,
+    ) -> list[Path]:
+        """Write section as several documents (shards), one per top-level heading, or
+        per `shard_groups` comment groups (top-level headings are never split), with
+        the same options as `write`. Shards are numbered after `filename`, which lists
+        them."""
+        check_writer(writer, workers, cache, pipeline)
+        data = self.section_data()
+        report(data)
         path = Path(filename)
         path.parent.mkdir(exist_ok=True)
+        split = list(split_shards(data, shard_groups))
+        remove_stale_shards(path, len(split))
+        shards = []
+        for number, shard in enumerate(split, start=1):
+            shard_file = shard_path(path, number)
+            with stage("write shard", filename=str(shard_file)):
+                self._write_data(
+                    shard_file,
+                    shard,
+                    outline_level,
+                    writer,
+                    workers,
+                    cache,
+                    pipeline,
+                    compression,
+                    template_cache,
+                )
+            shards.append((shard_file, shard))
+        write_manifest(path, shards, compression, template_cache)
+        if cache is not None:
+            cache.prune()
+            cache.report()
+        cache_report()
+        intern_report()
+        return [shard_file for shard_file, _ in shards]
+
+    def _write_data(
+        self,
+        filename: str | Path,
+        data: Iterable[dict],
+        outline_level: int,
+        writer: str,
+        workers: int,
+        cache: FragmentCache | None,
+        pipeline: bool,
+        compression: int,
+        template_cache: str | Path | None,
+    ):
+        path = Path(filename)
+        path.parent.mkdir(exist_ok=True)
+
+        match writer:
+            case "docx":
+                doc = template_document(SECTION_STYLES, template_cache)
+                with stage("render"):
+                    recursive_write(doc, data, self.config, outline_level)
+                with stage("save"):
+                    save_document(path, doc, compression)
+            case "stream":
+                template = template_package(SECTION_STYLES, template_cache)
+                if workers == 1 and pipeline:
+                    from comment_response.write.pipeline import pipelined_write
+
+                    body = lambda stream: pipelined_write(
+                        stream, data, self.config, outline_level, cache
+                    )
+                elif workers == 1:
+                    body = lambda stream: ooxml.recursive_write(
+                        stream, data, self.config, outline_level, cache
+                    )
+                else:  # Rendering already overlaps saving in worker processes
+                    from comment_response.write.parallel import parallel_write
 
-        create_style(doc, "Comments")
-        create_style(doc, "Response", left_indent=0.5, next_style="Response")
-        recursive_write(doc, self.section_data(), self.config, outline_level)
+                    body = lambda stream: parallel_write(
+                        stream, data, self.config, outline_level, workers or None, cache
+                    )
+                with stage("render and save"):
+                    ooxml.write_package(path, template, body, compression)
+            case "spool":
+                from comment_response.write.spool import spooled_write
 
-        doc.save(path)
+                spooled_write(
+                    path,
+                    template_package(SECTION_STYLES, template_cache),
+                    data,
+                    self.config,
+                    outline_level,
+                    cache,
+                    compression,
+                )
 
     @property
     def automark(self):
-        return AutoMark(self.records, self.config)
+        if self.selected is None:
+            return AutoMark(self.records, self.config)
+        return AutoMark([self.records[row] for row in self.selected], self.config)
@@ -0,0 +1,236 @@
+"""Write the sections again whenever their spreadsheet is saved.
+
+The configuration, document template and grouped records of each section are kept in
+memory. When the spreadsheet changes (polled by modification time and size), its
+records are read again and compared row by row with the previous ones. Only the
+top-level headings of changed rows (before and after the change) are grouped again,
+and, with the "stream" or "spool" writer, only their XML is rendered again: the
+document is saved from the rendered XML of every top-level heading. The AutoMark
+documents are written again only if their entries changed.
+
+Watch mode writes each section to its 'savename' document. The 'shards', 'workers',
+'pipeline', 'cache' and 'exports' settings are ignored.
+"""
+
+import io
+import logging
+import os
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from xlsx_rich_text.sheets.record import Record
+
+from comment_response.batch import open_sheet, open_workbook, section_configs
+from comment_response.group.columns import RecordColumns
+from comment_response.group.index_group import group_columns
+from comment_response.group.query import RecordFilter, RecordIndex
+from comment_response.group.sort_records import Heading, SortRecords
+from comment_response.group.statistics import StatisticsIndex, report
+from comment_response.section import required_columns
+from comment_response.write import ooxml
+from comment_response.write.automark import DEFAULT_VARIANT, AutoMark
+from comment_response.write.cache import cell_key
+from comment_response.write.docx import recursive_write
+from comment_response.write.package import DEFAULT_COMPRESSION, save_document
+from comment_response.write.templates import (
+    SECTION_STYLES,
+    template_document,
+    template_package,
+)
+
+POLL_INTERVAL = 0.25  # Seconds
+NO_HEADING = Heading(0, "")  # Top-level key of records without a heading
+
+
+def file_state(filename: str) -> tuple[int, int] | None:
+    """Modification time and size of a file, or None if it does not exist."""
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def node_heading(node: dict) -> Heading:
+    return node.get("heading", NO_HEADING)
+
+
+class SectionWatcher:
+    """Section of a configuration, kept in memory between changes of its
+    spreadsheet."""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.section_config: dict = config["section"]
+        self.sort = SortRecords(self.section_config["sort"])
+        self.query = RecordFilter.from_config(self.section_config.get("filter"))
+        self.columns = required_columns(self.section_config)
+        self.statistics = StatisticsIndex(self.section_config["columns"])
+        self.template_cache = config.get("template_cache") or None
+        self.template = template_package(SECTION_STYLES, self.template_cache)
+        self.records: dict[int, Record] = {}
+        self.keys: dict[int, tuple[str, ...]] = {}
+        self.grouped: list[dict] = []
+        self.fragments: dict[int, tuple[dict, str]] = {}  # By id of top-level nodes
+        self.automark_entries = None
+
+    def record_key(self, record: Record) -> tuple[str, ...]:
+        """Contents of the cells used by the section."""
+        return tuple(cell_key(record.col.get(column)) for column in self.columns)
+
+    def top_heading(self, record: Record) -> Heading:
+        number_col, title_col = self.sort.key()[0]
+        return Heading(
+            int(record.col.get(number_col, 0)), str(record.col.get(title_col, ""))
+        )
+
+    def read(self) -> dict[int, Record]:
+        """Records of the sheet matching the section filter, by row number, read
+        again from the spreadsheet."""
+        sheet = open_sheet(open_workbook(self.config), self.config)
+        if not self.query:
+            return dict(sheet.records)
+        rows = list(sheet.records)
+        records = list(sheet.records.values())
+        index = RecordIndex(
+            records,
+            RecordColumns(records, self.sort.key()),
+            self.section_config["columns"],
+        )
+        return {rows[row]: records[row] for row in index.select(self.query)}
+
+    def update(self, records: dict[int, Record]) -> tuple[int, int]:
+        """Group the records again, reusing the top-level headings without changed
+        rows. Returns the number of changed rows and regrouped top-level headings."""
+        keys = {row: self.record_key(record) for row, record in records.items()}
+        changed = {
+            row
+            for row in self.keys.keys() | keys.keys()
+            if self.keys.get(row) != keys.get(row)
+        }
+        affected = {
+            self.top_heading(rows[row])
+            for rows in (self.records, records)
+            for row in changed
+            if row in rows
+        }
+        subset = [
+            record
+            for record in records.values()
+            if self.top_heading(record) in affected
+        ]
+        nodes = {
+            node_heading(node): node
+            for node in self.grouped
+            if node_heading(node) not in affected
+        }
+        if subset:
+            regrouped = group_columns(
+                subset,
+                RecordColumns(subset, self.sort.key()),
+                self.sort.by_count,
+                self.statistics,
+            )
+            nodes.update((node_heading(node), node) for node in regrouped)
+
+        self.grouped = [nodes[heading] for heading in sorted(nodes)]
+        self.records = records
+        self.keys = keys
+        return len(changed), len(affected & nodes.keys())
+
+    def render(self, node: dict) -> str:
+        """Document XML of a top-level node, rendered again only if it changed."""
+        cached = self.fragments.get(id(node))
+        if cached is not None and cached[0] is node:
+            return cached[1]
+        buffer = io.StringIO()
+        ooxml.recursive_write(
+            buffer, [node], self.section_config, self.config["outline_level"]
+        )
+        return buffer.getvalue()
+
+    def write(self) -> None:
+        """Write the section, and the AutoMark documents if their entries changed."""
+        compression = self.config.get("compression", DEFAULT_COMPRESSION)
+        path = Path(self.config["savename"])
+        path.parent.mkdir(exist_ok=True)
+        if self.config.get("writer", "docx") in ("stream", "spool"):
+            self.fragments = {
+                id(node): (node, self.render(node)) for node in self.grouped
+            }
+            ooxml.write_package(
+                path,
+                self.template,
+                lambda stream: stream.writelines(
+                    fragment for _, fragment in self.fragments.values()
+                ),
+                compression,
+            )
+        else:
+            doc = template_document(SECTION_STYLES, self.template_cache)
+            recursive_write(
+                doc, self.grouped, self.section_config, self.config["outline_level"]
+            )
+            save_document(path, doc, compression)
+
+        variants = {
+            self.config["automark"]: DEFAULT_VARIANT,
+            **self.config.get("automark_variants", {}),
+        }
+        automark = AutoMark(list(self.records.values()), self.section_config)
+        entries = automark.variant_entries(
+            {tuple(variant) for variant in variants.values()}
+        )
+        if entries != self.automark_entries:
+            automark.write_variants(variants, compression, self.template_cache)
+            self.automark_entries = entries
+
+    def cycle(self) -> str:
+        """Read, group and write the section again. Returns a summary of the cycle."""
+        start = time.perf_counter()
+        changed, regrouped = self.update(self.read())
+        report(self.grouped)
+        self.write()
+        return (
+            f"{self.config['savename']}: {changed} changed rows, {regrouped} of "
+            f"{len(self.grouped)} top-level headings regrouped "
+            f"({time.perf_counter() - start:.3f}s)"
+        )
+
+
+def watch(
+    config: dict,
+    interval: float = POLL_INTERVAL,
+    output: Callable[[str], None] = print,
+) -> None:
+    """Write all sections of a configuration, then write the sections of a
+    spreadsheet again whenever it is saved, until interrupted. The latency of each
+    cycle is reported through `output`."""
+    watchers: dict[str, list[SectionWatcher]] = {}
+    for section_config in section_configs(config):
+        watchers.setdefault(section_config["filename"], []).append(
+            SectionWatcher(section_config)
+        )
+
+    states = {filename: None for filename in watchers}
+    output(f"Watching {', '.join(watchers)} (Ctrl+C to stop).")
+    try:
+        while True:
+            for filename, file_watchers in watchers.items():
+                state = file_state(filename)
+                if state is None or state == states[filename]:
+                    continue
+                time.sleep(interval)  # Let the spreadsheet application finish saving
+                if file_state(filename) != state:
+                    continue
+                states[filename] = state
+                for watcher in file_watchers:
+                    try:
+                        output(watcher.cycle())
+                    except Exception:  # Keep watching, e.g. after a partial save
+                        logging.exception("Could not write '%s'.", filename)
+                        output(f"{watcher.config['savename']}: failed (see log).")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        output("Stopped watching.")
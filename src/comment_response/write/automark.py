@@ -1,13 +1,37 @@
 """Create automark doc."""
 
+from collections.abc import Iterable
+from functools import cached_property
 from pathlib import Path
+from typing import TextIO
 
-import docx
-from docx.document import Document as _Document
-from docx.table import _Cell
 from xlsx_rich_text.sheets.record import Record
 
 from comment_response.logger.logger import log_write
+from comment_response.write import ooxml
+from comment_response.write.package import DEFAULT_COMPRESSION
+from comment_response.write.templates import NO_STYLES, template_package, text_width
+
+# Columns (keys of the 'columns' section config) for the text to mark and the index
+# entry of the default automark table.
+DEFAULT_VARIANT: tuple[str, str] = ("comment_tag", "commenter")
+
+
+def table_xml(stream: TextIO, entries: list[tuple[str, str]], col_width: int) -> None:
+    """Stream a two-column table, as created by python-docx, with one row per entry."""
+    cell = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr><w:p>'
+    stream.write(
+        '<w:tbl><w:tblPr><w:tblW w:type="auto" w:w="0"/><w:tblLook w:firstColumn="1" '
+        'w:firstRow="1" w:lastColumn="0" w:lastRow="0" w:noHBand="0" w:noVBand="1" '
+        f'w:val="04A0"/></w:tblPr><w:tblGrid><w:gridCol w:w="{col_width}"/>'
+        f'<w:gridCol w:w="{col_width}"/></w:tblGrid>'
+    )
+    for text, entry in entries:
+        stream.write(
+            f"<w:tr>{cell}{ooxml.run_xml(text)}</w:p></w:tc>"
+            f"{cell}{ooxml.run_xml(entry)}</w:p></w:tc></w:tr>"
+        )
+    stream.write("</w:tbl>")
 
 
 class AutoMark:
@@ -15,32 +39,71 @@ class AutoMark:
 
     def __init__(self, records: list[Record], config: dict):
         self.records = records
+        self.columns = config["columns"]
         self.commenter = config["columns"]["commenter"]
         self.comment_tag = config["columns"]["comment_tag"]
 
-    @property
+    def variant_entries(
+        self, variants: Iterable[tuple[str, str]]
+    ) -> dict[tuple[str, str], list[tuple[str, str]]]:
+        """Entries of several automark tables, collected in a single pass over the
+        records. Each variant is a pair of column keys: the text to mark and the
+        index entry."""
+        variants = {
+            variant: (self.columns[variant[0]], self.columns[variant[1]])
+            for variant in variants
+        }
+        entries = {variant: set() for variant in variants}
+        for record in self.records:
+            for variant, (text_col, entry_col) in variants.items():
+                text, entry = record.col[text_col], record.col[entry_col]
+                entries[variant].add((str(text), str(entry)))
+        return {variant: sorted(entry) for variant, entry in entries.items()}
+
+    @cached_property
     def entries(self) -> list[tuple[str, str]]:
         """Entries to be written to AutoMark document."""
-        entry = {
-            (str(record.col[self.comment_tag]), str(record.col[self.commenter]))
-            for record in self.records
-        }
-        return sorted(entry)
+        return self.variant_entries([DEFAULT_VARIANT])[DEFAULT_VARIANT]
 
     @log_write
-    def write(self, filename=r"output\automark.docx") -> None:
-        """Write AutoMark document."""
+    def _write_entries(
+        self,
+        filename: str,
+        entries: list[tuple[str, str]],
+        compression: int = DEFAULT_COMPRESSION,
+        template_cache: str | Path | None = None,
+    ) -> None:
         path = Path(filename)
         path.parent.mkdir(exist_ok=True)
 
-        doc: _Document = docx.Document()
-        table = doc.add_table(rows=len(self.entries), cols=2)
+        template = template_package(NO_STYLES, template_cache)
+        col_width = text_width(template) // 2
 
-        # https://theprogrammingexpert.com/write-table-fast-python-docx/
-        table_cells: list[_Cell] = table._cells
-        for row_number, row_values in enumerate(self.entries):
-            for col_number, col_value in enumerate(row_values):
-                position = col_number + row_number * 2
-                table_cells[position].text = str(col_value)
+        ooxml.write_package(
+            path,
+            template,
+            lambda stream: table_xml(stream, entries, col_width),
+            compression,
+        )
+
+    def write(
+        self,
+        filename=r"output\automark.docx",
+        compression: int = DEFAULT_COMPRESSION,
+        template_cache: str | Path | None = None,
+    ) -> None:
+        """Write AutoMark document."""
+        self._write_entries(filename, self.entries, compression, template_cache)
 
-        doc.save(filename)
+    def write_variants(
+        self,
+        variants: dict[str, tuple[str, str]],
+        compression: int = DEFAULT_COMPRESSION,
+        template_cache: str | Path | None = None,
+    ) -> None:
+        """Write several AutoMark documents, by filename, from one pass over the
+        records."""
+        variants = {filename: tuple(variant) for filename, variant in variants.items()}
+        entries = self.variant_entries(set(variants.values()))
+        for filename, variant in variants.items():
+            self._write_entries(filename, entries[variant], compression, template_cache)
@@ -0,0 +1,96 @@
+"""On-disk cache of rendered comment group fragments.
+
+Fragments are keyed by a hash of everything that affects how a comment group is
+rendered: the comment, tag and response cells of its records and the 'other' section
+settings. Unchanged groups are read from the cache instead of being rendered again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from comment_response.parts.comment_group import CommentGroup
+from comment_response.parts.intern import value_key
+
+CACHE_VERSION = "1"
+
+
+def cell_key(cell) -> str:
+    """Text and format properties of a cell (`value_key`), so cached groups are never
+    decoded."""
+    return value_key(getattr(cell, "value", None))
+
+
+class FragmentCache:
+    """Cache of rendered fragments in `directory`, limited to `max_size` bytes. The
+    least recently used fragments are evicted first."""
+
+    def __init__(self, directory: str | Path, max_size: int = 512 * 2**20):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def key(self, records: CommentGroup, config: dict) -> str:
+        digest = hashlib.sha256(CACHE_VERSION.encode())
+        digest.update(json.dumps(config["other"], sort_keys=True).encode())
+        columns = config["columns"]
+        for record in records.records:
+            for column in ("comment", "comment_tag", "response"):
+                digest.update(cell_key(record.col.get(columns[column])).encode())
+                digest.update(b"\0")
+            digest.update(b"\n")
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.xml"
+
+    def get(self, key: str) -> str | None:
+        path = self._path(key)
+        try:
+            fragment = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        return fragment
+
+    def put(self, key: str, fragment: str) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.directory, suffix=".tmp", delete=False
+        ) as file:
+            file.write(fragment)
+        os.replace(file.name, self._path(key))
+
+    def prune(self) -> None:
+        """Evict least recently used fragments until the cache fits `max_size`."""
+        if not self.directory.is_dir():
+            return
+        entries = []
+        for path in self.directory.glob("*.xml"):
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            self.evicted += 1
+
+    def report(self) -> None:
+        total = self.hits + self.misses
+        logging.info(
+            "Fragment cache '%s': %d hits, %d misses (%.0f%% hit rate), %d evicted.",
+            self.directory,
+            self.hits,
+            self.misses,
+            100 * self.hits / total if total else 0,
+            self.evicted,
+        )
@@ -1,38 +1,47 @@
 """Write comment-response section."""
 
-from docx.document import Document
+from collections.abc import Callable
+from typing import TYPE_CHECKING
 
 from comment_response.group.recursive_group import Heading
+from comment_response.group.statistics import GroupStats
 from comment_response.parts.comment_group import CommentGroup
+from comment_response.parts.paragraph import Paragraph, count_written
 from comment_response.write.format_adapter import format_adapter
 
+if TYPE_CHECKING:
+    from docx.document import Document
+    from docx.text.paragraph import Paragraph as DocxParagraph
+
+
+def add_runs(paragraph: "DocxParagraph", para: Paragraph) -> None:
+    """Add the runs of a cell paragraph, with their format properties."""
+    count_written(para)
+    for run in para.runs:
+        added_run = paragraph.add_run(run.text)
+        if run.props:
+            format_adapter(run.props, added_run)
+
 
 def write_comments(
-    document: Document, records: CommentGroup, custom_config: dict
+    document: "Document", records: CommentGroup, custom_config: dict
 ) -> None:
-    for comment in records.comments:
+    comments = records.comments
+    for comment in comments:
         paragraph = document.add_paragraph(style="Comments")
-        if len(records.comments) > 1 or custom_config["comment_intro_every_comment"]:
+        if len(comments) > 1 or custom_config["comment_intro_every_comment"]:
             intro = paragraph.add_run(custom_config["comment_intro"])
             intro.underline = True
             paragraph.add_run(custom_config["intro_sep"])
-        for para in (paras := comment.paragraphs):
-            if para == paras[0]:
-                for run in para.runs:
-                    added_run = paragraph.add_run(run.text)
-                    if run.props:
-                        format_adapter(run.props, added_run)
-            else:
+        for para_no, para in enumerate(comment.paragraphs):
+            if para_no:
                 paragraph = document.add_paragraph(style="Comments")
-                for run in para.runs:
-                    added_run = paragraph.add_run(run.text)
-                    if run.props:
-                        format_adapter(run.props, added_run)
+            add_runs(paragraph, para)
         paragraph.add_run(f" ({comment.tag})")
 
 
 def write_response(
-    document: Document, records: CommentGroup, custom_config: dict
+    document: "Document", records: CommentGroup, custom_config: dict
 ) -> None:
     paragraph = document.add_paragraph(style="Response")
     intro = paragraph.add_run(custom_config["response_intro"])
@@ -40,53 +49,79 @@ def write_response(
     intro.bold = True
     paragraph.add_run(custom_config["intro_sep"])
     for para_no, para in enumerate(records.response.paragraphs):
-        if para_no == 0:
-            for run in para.runs:
-                added_run = paragraph.add_run(run.text)
-                if run.props:
-                    format_adapter(run.props, added_run)
-        else:
+        if para_no:
             paragraph = document.add_paragraph(style="Response")
-            for run in para.runs:
-                added_run = paragraph.add_run(run.text)
-                if run.props:
-                    format_adapter(run.props, added_run)
+        add_runs(paragraph, para)
 
 
-def indicate_quantity(records: CommentGroup, quantity_config: dict) -> str:
+def indicate_quantity(
+    records: CommentGroup, quantity_config: dict, stats: GroupStats | None = None
+) -> str:
+    """Heading prefix for the number of comments, read from the group statistics if
+    given. Collapsed groups are counted after collapsing, as written."""
     if quantity_config["indicate_quantity"]:
-        multiple = len(records.comments) > 1
+        if stats is not None and not records.collapse:
+            comments = stats.comments
+        else:
+            comments = len(records.comments)
+        multiple = comments > 1
         if multiple:
             return quantity_config["multiple_comments"]
         return quantity_config["single_comment"]
     return ""
 
 
-def recursive_write(
-    document: Document,
+def walk_section(
     grouped_records: list[dict],
     config: dict,
-    outline_level: int = 0,
-):
-    """Recursively write comments and response section."""
+    outline_level: int,
+    heading: Callable[[str, int], None],
+    group: Callable[[CommentGroup, tuple[str, ...]], None],
+    path: tuple[str, ...] = (),
+) -> None:
+    """Recursively pass the headings and comment groups of a section to the writer
+    callbacks, in document order: `heading(text, level)` and `group(records, path)`,
+    with the titles of the headings above the group."""
     outline_level += 1
     for item in grouped_records:
         match item:
-            case {"heading": Heading() as heading, "data": [{"records": records}]}:
+            case {"heading": Heading() as title, "data": [{"records": records}]}:
                 # Base case (normal)
                 records = CommentGroup(records, config)
-                pre = indicate_quantity(records, config["other"]["quantity"])
-                document.add_heading(f"{pre}{heading.title}", level=outline_level)
-                write_comments(document, records, config["other"]["custom"])
-                write_response(document, records, config["other"]["custom"])
+                pre = indicate_quantity(
+                    records, config["other"]["quantity"], item.get("stats")
+                )
+                heading(f"{pre}{title.title}", outline_level)
+                group(records, (*path, title.title))
 
             case {"records": records}:
                 # Base case (for when records are not fully classified)
-                records = CommentGroup(records, config)
-                write_comments(document, records, config["other"]["custom"])
-                write_response(document, records, config["other"]["custom"])
+                group(CommentGroup(records, config), path)
 
-            case {"heading": Heading() as heading, "data": data}:
+            case {"heading": Heading() as title, "data": data}:
                 # Recursive case (only writes heading)
-                document.add_heading(heading.title, level=outline_level)
-                recursive_write(document, data, config, outline_level)
+                heading(title.title, outline_level)
+                walk_section(
+                    data, config, outline_level, heading, group, (*path, title.title)
+                )
+
+
+def recursive_write(
+    document: "Document",
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+):
+    """Recursively write comments and response section."""
+
+    def write_group(records: CommentGroup, _path: tuple[str, ...]) -> None:
+        write_comments(document, records, config["other"]["custom"])
+        write_response(document, records, config["other"]["custom"])
+
+    walk_section(
+        grouped_records,
+        config,
+        outline_level,
+        lambda text, level: document.add_heading(text, level=level),
+        write_group,
+    )
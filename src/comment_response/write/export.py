@@ -0,0 +1,475 @@
+"""Export the section to several formats in one pass.
+
+The grouped records are walked once, and each comment group is parsed and cleaned once
+(`CommentGroup`), then passed to a streaming writer for each output: the section
+document ("docx"), a web page ("html"), Markdown ("markdown"), or JSON lines ("jsonl",
+one comment group per line, e.g. for a search index). The format properties of runs
+are mapped to each format once per distinct format, from the same `font_properties` as
+the section document. Formats are added by adding an `ExportWriter` to `FORMATS`.
+"""
+
+import html
+import json
+import re
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from contextlib import ExitStack
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from itertools import groupby
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from comment_response.parts.comment_group import CommentGroup
+from comment_response.parts.intern import intern_limit
+from comment_response.parts.paragraph import Paragraph
+from comment_response.write import docx, ooxml
+from comment_response.write.cache import FragmentCache
+from comment_response.write.docx import walk_section
+from comment_response.write.format_adapter import (
+    DOUBLE_UNDERLINE,
+    RPR_CACHE_SIZE,
+    font_properties,
+    props_from_key,
+    props_key,
+)
+from comment_response.write.package import (
+    DEFAULT_COMPRESSION,
+    atomic_file,
+    save_document,
+)
+from comment_response.write.spool import SPOOL_INTERN_SIZE, SPOOL_SIZE, release
+from comment_response.write.templates import (
+    SECTION_STYLES,
+    template_document,
+    template_package,
+)
+
+if TYPE_CHECKING:
+    from docx.document import Document
+
+# Runs of an exported paragraph: text and format key (`props_key`) of each run.
+Runs = list[tuple[str, tuple]]
+
+PLAIN = props_key({})
+COMMENT_INTRO = props_key({"u": {}})  # Underlined
+RESPONSE_INTRO = props_key({"b": {}, "i": {}})  # Bold italic
+
+
+@dataclass(frozen=True)
+class ExportOptions:
+    """Options of the section document: writer, fragment cache (with the "stream" and
+    "spool" writers), compression level and template cache directory."""
+
+    writer: str = "stream"
+    cache: FragmentCache | None = None
+    compression: int = DEFAULT_COMPRESSION
+    template_cache: str | Path | None = None
+
+
+def paragraph_runs(paragraph: Paragraph) -> Runs:
+    return [(run.text, props_key(run.props or {})) for run in paragraph.runs]
+
+
+class ExportGroup:
+    """Comment group passed to every writer, with the titles of its headings."""
+
+    def __init__(self, records: CommentGroup, path: tuple[str, ...], config: dict):
+        self.records = records
+        self.path = path
+        self.custom_config: dict = config["other"]["custom"]
+
+    @cached_property
+    def paragraphs(self) -> list[tuple[str, Runs]]:
+        """Paragraphs laid out as in the section document: style ("Comments" or
+        "Response") and runs, with the comment and response introductions."""
+        custom = self.custom_config
+        paragraphs = []
+        comments = self.records.comments
+        for comment in comments:
+            runs = []
+            if len(comments) > 1 or custom["comment_intro_every_comment"]:
+                runs.append((custom["comment_intro"], COMMENT_INTRO))
+                runs.append((custom["intro_sep"], PLAIN))
+            for para_no, para in enumerate(comment.paragraphs):
+                if para_no:
+                    paragraphs.append(("Comments", runs))
+                    runs = []
+                runs.extend(paragraph_runs(para))
+            runs.append((f" ({comment.tag})", PLAIN))
+            paragraphs.append(("Comments", runs))
+
+        runs = [
+            (custom["response_intro"], RESPONSE_INTRO),
+            (custom["intro_sep"], PLAIN),
+        ]
+        for para_no, para in enumerate(self.records.response.paragraphs):
+            if para_no:
+                paragraphs.append(("Response", runs))
+                runs = []
+            runs.extend(paragraph_runs(para))
+        paragraphs.append(("Response", runs))
+        return paragraphs
+
+
+class ExportWriter(ABC):
+    """Streaming writer of one format. Opened before the section is walked, receives
+    its headings and comment groups in document order, then saves the output. Nothing
+    is saved if walking the section failed."""
+
+    def __init__(self, path: Path, config: dict, options: ExportOptions):
+        self.path = path
+        self.config = config
+        self.options = options
+        self._stack = ExitStack()  # Resources released once saved
+
+    def __enter__(self) -> "ExportWriter":
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> bool:
+        if exc_type is not None:
+            return self._stack.__exit__(exc_type, exc, traceback)
+        with self._stack:
+            self.save()
+        return False
+
+    def open(self) -> None:
+        """Open the output, before the section is walked."""
+
+    @abstractmethod
+    def heading(self, text: str, level: int) -> None:
+        """Write a heading."""
+
+    @abstractmethod
+    def group(self, group: ExportGroup) -> None:
+        """Write a comment group."""
+
+    def save(self) -> None:
+        """Complete the output, once the section is walked."""
+
+
+class DocxExport(ExportWriter):
+    """Section document, written with the writer of the options: as XML spooled to a
+    temporary file ("stream", "spool"), or with python-docx ("docx")."""
+
+    def __init__(self, path: Path, config: dict, options: ExportOptions):
+        super().__init__(path, config, options)
+        self.document: "Document | None" = None  # With the "docx" writer
+        self.template: bytes | None = None  # With the OOXML writers
+        self.spool: TextIO | None = None
+
+    def open(self) -> None:
+        template_cache = self.options.template_cache
+        if self.options.writer == "docx":
+            self.document = template_document(SECTION_STYLES, template_cache)
+            return
+        self.template = template_package(SECTION_STYLES, template_cache)
+        self.spool = self._stack.enter_context(
+            tempfile.SpooledTemporaryFile(
+                SPOOL_SIZE, "w+", encoding="utf-8", newline=""
+            )
+        )
+
+    def heading(self, text: str, level: int) -> None:
+        if self.options.writer == "docx":
+            self.document.add_heading(text, level=level)
+        else:
+            self.spool.write(ooxml.heading_xml(text, level))
+
+    def group(self, group: ExportGroup) -> None:
+        records = group.records
+        if self.options.writer == "docx":
+            docx.write_comments(self.document, records, group.custom_config)
+            docx.write_response(self.document, records, group.custom_config)
+        else:
+            ooxml.write_group(self.spool, records, self.config, self.options.cache)
+
+    def save(self) -> None:
+        if self.options.writer == "docx":
+            save_document(self.path, self.document, self.options.compression)
+            return
+        self.spool.seek(0)
+        ooxml.write_package(
+            self.path,
+            self.template,
+            lambda stream: shutil.copyfileobj(self.spool, stream),
+            self.options.compression,
+        )
+
+
+class TextExport(ExportWriter, ABC):
+    """Text file, written as the section is walked and renamed into place once
+    saved."""
+
+    def __init__(self, path: Path, config: dict, options: ExportOptions):
+        super().__init__(path, config, options)
+        self.stream: TextIO | None = None
+
+    def open(self) -> None:
+        self.stream = self._stack.enter_context(atomic_file(self.path))
+
+
+# HTML elements of DOCX font properties, in nesting order.
+HTML_ELEMENTS: tuple[tuple[str, str], ...] = (
+    ("bold", "strong"),
+    ("italic", "em"),
+    ("underline", "u"),
+    ("strike", "s"),
+    ("double_strike", "s"),
+    ("superscript", "sup"),
+    ("subscript", "sub"),
+)
+HTML_STYLE = (
+    "p.response { margin-left: 0.5in; } " ".double { text-decoration-style: double; }"
+)
+LINE_BREAK = re.compile(r"\r\n?|\n")
+
+
+@lru_cache(maxsize=RPR_CACHE_SIZE)
+def html_tags(key: tuple) -> tuple[str, str]:
+    """Opening and closing HTML tags of a format."""
+    font = font_properties(props_from_key(key))
+    tags = []
+    for name, element in HTML_ELEMENTS:
+        value = font.get(name)
+        if not value:
+            continue
+        double = name == "double_strike" or value == DOUBLE_UNDERLINE
+        tags.append((element, ' class="double"' if double else ""))
+    return (
+        "".join(f"<{element}{attrs}>" for element, attrs in tags),
+        "".join(f"</{element}>" for element, _ in reversed(tags)),
+    )
+
+
+def html_text(text: str) -> str:
+    return LINE_BREAK.sub("<br>", html.escape(text, quote=False))
+
+
+class HtmlExport(TextExport):
+    """Web page of the section. Responses are indented, as in the section
+    document."""
+
+    def open(self) -> None:
+        super().open()
+        title = html.escape(self.path.stem)
+        self.stream.write(
+            '<!DOCTYPE html>\n<html>\n<head>\n<meta charset="utf-8">\n'
+            f"<title>{title}</title>\n<style>{HTML_STYLE}</style>\n"
+            "</head>\n<body>\n"
+        )
+
+    def heading(self, text: str, level: int) -> None:
+        level = min(max(level, 1), 6)
+        self.stream.write(f"<h{level}>{html_text(text)}</h{level}>\n")
+
+    def group(self, group: ExportGroup) -> None:
+        for style, runs in group.paragraphs:
+            self.stream.write(f'<p class="{style.lower()}">')
+            for text, key in runs:
+                if text:
+                    start, end = html_tags(key)
+                    self.stream.write(f"{start}{html_text(text)}{end}")
+            self.stream.write("</p>\n")
+
+    def save(self) -> None:
+        self.stream.write("</body>\n</html>\n")
+
+
+MARKDOWN_SPECIAL = re.compile(r"([\\`*_\[\]<>~|#])")
+# Text at the start of a block read as a list item.
+MARKDOWN_LIST = re.compile(r"^(\s*)(\d+(?=[.)])|[-+])")
+
+
+@lru_cache(maxsize=RPR_CACHE_SIZE)
+def markdown_marks(key: tuple) -> tuple[str, str]:
+    """Opening and closing Markdown marks of a format. Underlines, superscripts and
+    subscripts, which Markdown lacks, are written as HTML."""
+    font = font_properties(props_from_key(key))
+    marks = []
+    if font.get("bold") and font.get("italic"):
+        marks.append(("***", "***"))
+    elif font.get("bold"):
+        marks.append(("**", "**"))
+    elif font.get("italic"):
+        marks.append(("*", "*"))
+    if font.get("strike") or font.get("double_strike"):
+        marks.append(("~~", "~~"))
+    for name, element in (
+        ("underline", "u"),
+        ("superscript", "sup"),
+        ("subscript", "sub"),
+    ):
+        if font.get(name):
+            marks.append((f"<{element}>", f"</{element}>"))
+    return (
+        "".join(start for start, _ in marks),
+        "".join(end for _, end in reversed(marks)),
+    )
+
+
+def markdown_text(text: str) -> str:
+    return LINE_BREAK.sub("<br>", MARKDOWN_SPECIAL.sub(r"\\\1", text))
+
+
+def markdown_run(text: str, marks: tuple[str, str]) -> str:
+    """Markdown of formatted text. Marks enclose the text without its surrounding
+    whitespace, as Markdown requires."""
+    start, end = marks
+    stripped = text.strip()
+    if not start or not stripped:
+        return markdown_text(text)
+    leading = text[: len(text) - len(text.lstrip())]
+    trailing = text[len(text.rstrip()) :]
+    return f"{leading}{start}{markdown_text(stripped)}{end}{trailing}"
+
+
+def markdown_block(text: str) -> str:
+    """Block text, escaped if it would be read as a list item."""
+    match = MARKDOWN_LIST.match(text)
+    if match is None:
+        return text
+    if match[2].isdigit():  # Escape the period or parenthesis of "1." or "1)"
+        return f"{text[: match.end()]}\\{text[match.end() :]}"
+    return f"{match[1]}\\{text[match.start(2) :]}"
+
+
+class MarkdownExport(TextExport):
+    """Markdown of the section. Responses are block quotes."""
+
+    def heading(self, text: str, level: int) -> None:
+        level = min(max(level, 1), 6)
+        self.stream.write(f"{'#' * level} {markdown_text(text)}\n\n")
+
+    def group(self, group: ExportGroup) -> None:
+        for style, runs in group.paragraphs:
+            # Runs with the same marks are joined: "**a****b**" is not bold
+            text = markdown_block(
+                "".join(
+                    markdown_run("".join(text for text, _ in same), marks)
+                    for marks, same in groupby(
+                        runs, key=lambda run: markdown_marks(run[1])
+                    )
+                )
+            )
+            prefix = "> " if style == "Response" else ""
+            self.stream.write(f"{prefix}{text}\n\n")
+
+
+@lru_cache(maxsize=RPR_CACHE_SIZE)
+def json_font(key: tuple) -> dict[str, bool | str]:
+    """DOCX font properties of a format. Shared between runs; never modify."""
+    return font_properties(props_from_key(key))
+
+
+def json_paragraphs(paragraphs: Iterable[Paragraph]) -> list[list[dict]]:
+    return [
+        [
+            {"text": text, **json_font(key)}
+            for text, key in paragraph_runs(paragraph)
+            if text
+        ]
+        for paragraph in paragraphs
+    ]
+
+
+def paragraphs_text(paragraphs: Iterable[Paragraph]) -> str:
+    return "\n".join("".join(run.text for run in para.runs) for para in paragraphs)
+
+
+class JsonLinesExport(TextExport):
+    """One JSON object per comment group: heading titles, comments (tag, text and
+    formatted runs by paragraph) and response."""
+
+    def heading(self, text: str, level: int) -> None:
+        pass  # Each group lists the titles of its headings
+
+    def group(self, group: ExportGroup) -> None:
+        records = group.records
+        item = {
+            "path": list(group.path),
+            "comments": [
+                {
+                    "tag": comment.tag,
+                    "text": paragraphs_text(comment.paragraphs),
+                    "paragraphs": json_paragraphs(comment.paragraphs),
+                }
+                for comment in records.comments
+            ],
+            "response": {
+                "text": paragraphs_text(records.response.paragraphs),
+                "paragraphs": json_paragraphs(records.response.paragraphs),
+            },
+        }
+        self.stream.write(json.dumps(item, ensure_ascii=False))
+        self.stream.write("\n")
+
+
+# Writers of each export format, by name.
+FORMATS: dict[str, type[ExportWriter]] = {
+    "docx": DocxExport,
+    "html": HtmlExport,
+    "markdown": MarkdownExport,
+    "jsonl": JsonLinesExport,
+}
+
+
+def check_formats(outputs: dict[str | Path, str]) -> None:
+    """Raise ValueError for unknown export formats."""
+    for output_format in outputs.values():
+        if output_format not in FORMATS:
+            raise ValueError(
+                f"Unknown export format '{output_format}' (must be one of "
+                f"{', '.join(FORMATS)})."
+            )
+
+
+def export_records(
+    writers: list[ExportWriter],
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+) -> None:
+    """Recursively pass the headings and comment groups of a section to the
+    writers."""
+
+    def heading(text: str, level: int) -> None:
+        for writer in writers:
+            writer.heading(text, level)
+
+    def group(records: CommentGroup, path: tuple[str, ...]) -> None:
+        export_group = ExportGroup(records, path, config)
+        for writer in writers:
+            writer.group(export_group)
+
+    walk_section(grouped_records, config, outline_level, heading, group)
+
+
+def export_section(
+    outputs: dict[str | Path, str],
+    grouped_records: Iterable[dict],
+    config: dict,
+    outline_level: int = 0,
+    options: ExportOptions = ExportOptions(),
+) -> None:
+    """Write the section to each output (a path, mapped to its format) in a single
+    pass over the top-level nodes. With the "spool" writer, each node is released
+    once written, as by `spooled_write`."""
+    check_formats(outputs)
+    with ExitStack() as stack:
+        writers = []
+        for path, output_format in outputs.items():
+            path = Path(path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            writer = FORMATS[output_format](path, config, options)
+            writers.append(stack.enter_context(writer))
+        if options.writer == "spool":
+            stack.enter_context(intern_limit(SPOOL_INTERN_SIZE))
+        for node in grouped_records:
+            export_records(writers, [node], config, outline_level)
+            if options.writer == "spool":
+                release(node)
+            del node  # Before the next node is grouped
@@ -1,9 +1,36 @@
-"""Adapt formats from XLSX to DOCX"""
+"""Adapt formats from XLSX to DOCX
 
-from docx.enum.text import WD_UNDERLINE
-from docx.text.run import Run
+Spreadsheets use few distinct formats compared to the number of runs, so each distinct
+format is translated once: to a `<w:rPr>` element that is copied onto python-docx runs,
+or to `<w:rPr>` text for the streaming writer. python-docx is only imported for the
+elements, so the streaming writer does not load it.
+"""
 
-DOUBLE_UNDERLINE_STYLE: tuple[int, str, str] = WD_UNDERLINE.DOUBLE  # pylint: disable=no-member
+import logging
+from copy import deepcopy
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from docx.oxml.text.font import CT_RPr
+    from docx.text.run import Run
+
+# Underline value of double underlines (`WD_UNDERLINE.DOUBLE` for python-docx runs).
+DOUBLE_UNDERLINE = "double"
+
+# Maximum number of distinct formats kept translated.
+RPR_CACHE_SIZE = 1024
+
+# Run property elements in the order required by the WordprocessingML schema.
+RPR_ELEMENTS: tuple[tuple[str, str], ...] = (
+    ("bold", "b"),
+    ("italic", "i"),
+    ("strike", "strike"),
+    ("double_strike", "dstrike"),
+    ("underline", "u"),
+    ("superscript", "vertAlign"),
+    ("subscript", "vertAlign"),
+)
 
 
 def toggle(value_dict: dict[str:str]) -> bool:
@@ -22,32 +49,128 @@ def toggle(value_dict: dict[str:str]) -> bool:
             return False
 
 
-def format_adapter(tag: dict | None, run: Run) -> None:
-    """Adapt format properties from XLSX to DOCX."""
+def props_key(tag: dict) -> tuple:
+    """Hashable, canonical key of XLSX format properties."""
+    return tuple(
+        sorted((name, tuple(sorted(attrs.items()))) for name, attrs in tag.items())
+    )
+
+
+def font_properties(tag: dict) -> dict[str, bool | str]:
+    """Decode XLSX format properties to DOCX font properties."""
+    font = {}
     if "b" in tag:
-        run.font.bold = toggle(tag["b"])
+        font["bold"] = toggle(tag["b"])
     if "i" in tag:
-        run.font.italic = toggle(tag["i"])
+        font["italic"] = toggle(tag["i"])
     if "u" in tag:
         match tag["u"]:
             case {"val": _type}:
                 string = str(_type).casefold()
                 if string == "double" or string == "wavydouble":
-                    run.font.underline = DOUBLE_UNDERLINE_STYLE
+                    font["underline"] = DOUBLE_UNDERLINE
                 elif string == "none":
-                    run.font.underline = False
+                    font["underline"] = False
                 else:
-                    run.font.underline = True
+                    font["underline"] = True
             case _:
-                run.font.underline = toggle(tag["u"])
+                font["underline"] = toggle(tag["u"])
     if "strike" in tag:
         if tag.get("color", {}).get("rgb") == "FFFF0000":
-            run.font.double_strike = toggle(tag["strike"])
+            font["double_strike"] = toggle(tag["strike"])
         else:
-            run.font.strike = toggle(tag["strike"])
+            font["strike"] = toggle(tag["strike"])
     if "vertAlign" in tag:
         match tag["vertAlign"]:
             case {"val": "superscript"}:
-                run.font.superscript = True
+                font["superscript"] = True
             case {"val": "subscript"}:
-                run.font.subscript = True
+                font["subscript"] = True
+    return font
+
+
+def rpr_xml(font: dict[str, bool | str], namespaces: str = "") -> str:
+    """Serialize DOCX font properties to a `<w:rPr>` element, matching python-docx."""
+    elements = []
+    for name, element in RPR_ELEMENTS:
+        if name not in font:
+            continue
+        value = font[name]
+        match name:
+            case "underline":
+                if value is True:
+                    val = "single"
+                elif value is False:
+                    val = "none"
+                else:
+                    val = value
+                elements.append(f'<w:u w:val="{val}"/>')
+            case "superscript" | "subscript":
+                elements.append(f'<w:{element} w:val="{name}"/>')
+            case _:
+                val = "" if value else ' w:val="0"'
+                elements.append(f"<w:{element}{val}/>")
+    if elements:
+        return f"<w:rPr{namespaces}>{''.join(elements)}</w:rPr>"
+    return ""
+
+
+def props_from_key(key: tuple) -> dict:
+    return {name: dict(attrs) for name, attrs in key}
+
+
+@lru_cache(maxsize=RPR_CACHE_SIZE)
+def compiled_rpr(key: tuple) -> "CT_RPr | None":
+    """Run properties element for a format. Shared between runs; never modify."""
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls
+
+    xml = rpr_xml(font_properties(props_from_key(key)), f" {nsdecls('w')}")
+    return parse_xml(xml) if xml else None
+
+
+@lru_cache(maxsize=RPR_CACHE_SIZE)
+def compiled_rpr_xml(key: tuple) -> str:
+    """Run properties text for a format."""
+    return rpr_xml(font_properties(props_from_key(key)))
+
+
+def format_adapter(tag: dict | None, run: "Run") -> None:
+    """Adapt format properties from XLSX to DOCX."""
+    rpr = compiled_rpr(props_key(tag))
+    if rpr is None:
+        return
+    if run._r.rPr is not None:
+        # Merge into existing properties
+        from docx.enum.text import WD_UNDERLINE
+
+        for name, value in font_properties(tag).items():
+            if value == DOUBLE_UNDERLINE:
+                value = WD_UNDERLINE.DOUBLE  # pylint: disable=no-member
+            setattr(run.font, name, value)
+        return
+    run._r.insert(0, deepcopy(rpr))
+
+
+def run_rpr_xml(tag: dict) -> str:
+    """Run properties text of XLSX format properties."""
+    return compiled_rpr_xml(props_key(tag))
+
+
+def cache_report() -> None:
+    """Log hit rates of the format translation caches."""
+    for name, cache in (
+        ("rPr element", compiled_rpr),
+        ("rPr text", compiled_rpr_xml),
+    ):
+        info = cache.cache_info()
+        total = info.hits + info.misses
+        if total:
+            logging.info(
+                "Format cache (%s): %d hits, %d misses (%.1f%% hit rate), %d formats.",
+                name,
+                info.hits,
+                info.misses,
+                100 * info.hits / total,
+                info.currsize,
+            )
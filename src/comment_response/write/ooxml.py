@@ -0,0 +1,197 @@
+"""Stream comment-response section directly to OOXML.
+
+Instead of building python-docx objects for every paragraph and run, the document body
+is written to `word/document.xml` as XML text while the package is being zipped. The
+remaining package parts (styles, settings, etc.) are copied from a template document.
+"""
+
+import io
+import re
+import zipfile
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+from xml.sax.saxutils import escape
+
+from comment_response.parts.comment_group import CommentGroup
+from comment_response.parts.intern import rendered
+from comment_response.parts.paragraph import Paragraph, count_written
+from comment_response.write.cache import FragmentCache
+from comment_response.write.docx import walk_section
+from comment_response.write.format_adapter import rpr_xml, run_rpr_xml
+from comment_response.write.package import DEFAULT_COMPRESSION, atomic_package
+
+if TYPE_CHECKING:
+    from docx.document import Document
+
+DOCUMENT_PART = "word/document.xml"
+
+UNDERLINE = rpr_xml({"underline": True})
+BOLD_ITALIC = rpr_xml({"bold": True, "italic": True})
+
+# Characters not allowed in XML 1.0 (e.g. control characters read from `_x000B_`)
+INVALID_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]")
+
+
+def text_xml(text: str) -> str:
+    """Run content for text. Tabs and line breaks become `<w:tab/>` and `<w:br/>`."""
+    content = []
+    start = 0
+    for pos, char in enumerate(text):
+        if char in "\t\r\n":
+            content.append(t_xml(text[start:pos]))
+            content.append("<w:tab/>" if char == "\t" else "<w:br/>")
+            start = pos + 1
+    content.append(t_xml(text[start:]))
+    return "".join(content)
+
+
+def t_xml(text: str) -> str:
+    """Text element. Raises ValueError for characters not allowed in XML, like the
+    "docx" writer."""
+    if not text:
+        return ""
+    if INVALID_XML_CHARS.search(text):
+        raise ValueError(
+            "All strings must be XML compatible: Unicode or ASCII, no NULL bytes or "
+            "control characters"
+        )
+    if len(text.strip()) < len(text):
+        return f'<w:t xml:space="preserve">{escape(text)}</w:t>'
+    return f"<w:t>{escape(text)}</w:t>"
+
+
+def run_xml(text: str, rpr: str = "") -> str:
+    if not text and not rpr:
+        return "<w:r/>"
+    return f"<w:r>{rpr}{text_xml(text)}</w:r>"
+
+
+def paragraph_xml(style: str, runs: Iterable[str]) -> str:
+    return f'<w:p><w:pPr><w:pStyle w:val="{style}"/></w:pPr>{"".join(runs)}</w:p>'
+
+
+def heading_xml(text: str, level: int) -> str:
+    if not 0 <= level <= 9:
+        raise ValueError(f"level must be in range 0-9, got {level}")
+    style = "Title" if level == 0 else f"Heading{level}"
+    return paragraph_xml(style, [run_xml(text)] if text else [])
+
+
+def rich_runs_xml(runs) -> list[str]:
+    return [
+        run_xml(run.text, run_rpr_xml(run.props) if run.props else "") for run in runs
+    ]
+
+
+def paragraph_runs_xml(paragraph: Paragraph) -> str:
+    """Run XML of a paragraph, rendered once for paragraphs shared by identical
+    cells."""
+    count_written(paragraph)
+    return rendered("ooxml", paragraph, lambda: "".join(rich_runs_xml(paragraph.runs)))
+
+
+def write_comments(stream: TextIO, records: CommentGroup, custom_config: dict) -> None:
+    comments = records.comments
+    for comment in comments:
+        runs = []
+        if len(comments) > 1 or custom_config["comment_intro_every_comment"]:
+            runs.append(run_xml(custom_config["comment_intro"], UNDERLINE))
+            runs.append(run_xml(custom_config["intro_sep"]))
+        for para_no, para in enumerate(comment.paragraphs):
+            if para_no:
+                stream.write(paragraph_xml("Comments", runs))
+                runs = []
+            runs.append(paragraph_runs_xml(para))
+        runs.append(run_xml(f" ({comment.tag})"))
+        stream.write(paragraph_xml("Comments", runs))
+
+
+def write_response(stream: TextIO, records: CommentGroup, custom_config: dict) -> None:
+    runs = [
+        run_xml(custom_config["response_intro"], BOLD_ITALIC),
+        run_xml(custom_config["intro_sep"]),
+    ]
+    for para_no, para in enumerate(records.response.paragraphs):
+        if para_no:
+            stream.write(paragraph_xml("Response", runs))
+            runs = []
+        runs.append(paragraph_runs_xml(para))
+    stream.write(paragraph_xml("Response", runs))
+
+
+def write_group(
+    stream: TextIO, records: CommentGroup, config: dict, cache: FragmentCache = None
+) -> None:
+    """Stream comments and response of a comment group, reusing the cached fragment
+    if the group is unchanged."""
+    if cache is None:
+        write_comments(stream, records, config["other"]["custom"])
+        write_response(stream, records, config["other"]["custom"])
+        return
+    key = cache.key(records, config)
+    fragment = cache.get(key)
+    if fragment is None:
+        buffer = io.StringIO()
+        write_comments(buffer, records, config["other"]["custom"])
+        write_response(buffer, records, config["other"]["custom"])
+        fragment = buffer.getvalue()
+        cache.put(key, fragment)
+    stream.write(fragment)
+
+
+def recursive_write(
+    stream: TextIO,
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+    cache: FragmentCache = None,
+):
+    """Recursively stream comments and response section. Comment groups are read from
+    the fragment cache, if given."""
+    walk_section(
+        grouped_records,
+        config,
+        outline_level,
+        lambda text, level: stream.write(heading_xml(text, level)),
+        lambda records, _path: write_group(stream, records, config, cache),
+    )
+
+
+def split_document(xml: bytes) -> tuple[str, str]:
+    """Split template `document.xml` into the text before and after the body content."""
+    start = xml.index(b"<w:body>") + len(b"<w:body>")
+    end = xml.index(b"<w:sectPr", start)
+    return xml[:start].decode("utf-8"), xml[end:].decode("utf-8")
+
+
+def write_package(
+    filename: str | Path,
+    template: "Document | bytes",
+    write_body: Callable[[TextIO], None],
+    compression: int = DEFAULT_COMPRESSION,
+) -> None:
+    """Write docx package, copying all parts from the template (a python-docx
+    document, or package bytes) except the document body, which is streamed by
+    `write_body`."""
+    if isinstance(template, bytes):
+        buffer = io.BytesIO(template)
+    else:
+        buffer = io.BytesIO()
+        template.save(buffer)
+
+    with (
+        zipfile.ZipFile(buffer) as source,
+        atomic_package(filename, compression) as package,
+    ):
+        for info in source.infolist():
+            if info.filename != DOCUMENT_PART:
+                package.writestr(info.filename, source.read(info))
+                continue
+            head, tail = split_document(source.read(info))
+            with io.TextIOWrapper(
+                package.open(DOCUMENT_PART, "w"), encoding="utf-8", newline=""
+            ) as stream:
+                stream.write(head)
+                write_body(stream)
+                stream.write(tail)
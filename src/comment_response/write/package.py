@@ -0,0 +1,119 @@
+"""Save docx packages.
+
+Packages (and exported text files) are written to a temporary file next to the
+destination, then renamed over it, so an interrupted run never leaves a partial
+document. The compression level is configurable: 0 stores parts uncompressed (fastest,
+for drafts), 1-9 deflates them.
+"""
+
+import os
+import secrets
+import zipfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+from xml.sax.saxutils import quoteattr
+
+if TYPE_CHECKING:
+    from docx.document import Document
+
+DEFAULT_COMPRESSION = 6  # zlib default
+
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+# Content types of extensions given as defaults, as python-docx writes them
+DEFAULT_CONTENT_TYPES = {
+    "rels": "application/vnd.openxmlformats-package.relationships+xml",
+    "xml": "application/xml",
+}
+
+
+def compression_options(compression: int = DEFAULT_COMPRESSION) -> dict:
+    """`ZipFile` arguments for a compression level (0 to store parts)."""
+    if not 0 <= compression <= 9:
+        raise ValueError(f"Compression must be 0 to 9, not {compression}.")
+    if compression == 0:
+        return {"compression": zipfile.ZIP_STORED}
+    return {"compression": zipfile.ZIP_DEFLATED, "compresslevel": compression}
+
+
+@contextmanager
+def atomic_path(filename: str | Path) -> Iterator[Path]:
+    """Temporary path next to `filename`, renamed to it once complete (removed if the
+    context fails)."""
+    path = Path(filename)
+    temp = temp_path(path)
+    try:
+        yield temp
+        os.replace(temp, path)
+    except BaseException:
+        temp.unlink(missing_ok=True)
+        raise
+
+
+@contextmanager
+def atomic_package(
+    filename: str | Path, compression: int = DEFAULT_COMPRESSION
+) -> Iterator[zipfile.ZipFile]:
+    """Zip package written to a temporary file, renamed to `filename` once complete."""
+    options = compression_options(compression)
+    with atomic_path(filename) as temp:
+        with zipfile.ZipFile(temp, "x", **options) as package:
+            yield package
+
+
+@contextmanager
+def atomic_file(filename: str | Path) -> Iterator[TextIO]:
+    """UTF-8 text file written to a temporary file, renamed to `filename` once
+    complete."""
+    with atomic_path(filename) as temp:
+        with open(temp, "x", encoding="utf-8", newline="") as file:
+            yield file
+
+
+def temp_path(path: Path) -> Path:
+    return path.with_name(f".{path.name}.{secrets.token_hex(4)}.tmp")
+
+
+def content_types_xml(parts) -> str:
+    """`[Content_Types].xml` of package parts. Parts are typed by their extension
+    (the first part of each binary type, e.g. images), otherwise by their name."""
+    defaults = dict(DEFAULT_CONTENT_TYPES)
+    overrides = {}
+    for part in parts:
+        content_type = part.content_type
+        if defaults.setdefault(part.partname.ext.lower(), content_type) != content_type:
+            overrides[str(part.partname)] = content_type
+    return "".join(
+        [
+            "<?xml version='1.0' encoding='UTF-8' standalone='yes'?>\n",
+            f'<Types xmlns="{CONTENT_TYPES_NS}">',
+            *(
+                f"<Default Extension={quoteattr(ext)} ContentType={quoteattr(type_)}/>"
+                for ext, type_ in sorted(defaults.items())
+            ),
+            *(
+                f"<Override PartName={quoteattr(name)} ContentType={quoteattr(type_)}/>"
+                for name, type_ in sorted(overrides.items())
+            ),
+            "</Types>",
+        ]
+    )
+
+
+def save_document(
+    filename: str | Path, document: "Document", compression: int = DEFAULT_COMPRESSION
+) -> None:
+    """Save a python-docx document, like `Document.save`, writing its parts directly
+    at the given compression level."""
+    from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+
+    package = document.part.package
+    parts = list(package.iter_parts())
+    with atomic_package(filename, compression) as zip_package:
+        zip_package.writestr(CONTENT_TYPES_URI.membername, content_types_xml(parts))
+        zip_package.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+        for part in parts:
+            zip_package.writestr(part.partname.membername, part.blob)
+            if len(part.rels):
+                zip_package.writestr(part.partname.rels_uri.membername, part.rels.xml)
@@ -0,0 +1,63 @@
+"""Render top-level heading groups in parallel.
+
+Each top-level group of the section is independent, so its body XML is rendered in a
+worker process with the streaming writer. Fragments are written back in their original
+order, so the output is identical to rendering serially. The work counted by the
+profiler in each worker is returned with its fragment and added in the parent.
+"""
+
+import io
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import TextIO
+
+from comment_response.logger.profiler import add_counts, counters
+from comment_response.write import ooxml
+from comment_response.write.cache import FragmentCache
+
+
+def render_group(
+    item: dict, config: dict, outline_level: int, cache: FragmentCache = None
+) -> tuple[str, int, int, Counter]:
+    """Body XML of a single top-level group, with the fragment cache hits and misses
+    and the profiler counts while rendering it."""
+    stream = io.StringIO()
+    counts = counters()
+    if cache is None:
+        ooxml.recursive_write(stream, [item], config, outline_level)
+        return stream.getvalue(), 0, 0, counters() - counts
+    hits, misses = cache.hits, cache.misses
+    ooxml.recursive_write(stream, [item], config, outline_level, cache)
+    return (
+        stream.getvalue(),
+        cache.hits - hits,
+        cache.misses - misses,
+        counters() - counts,
+    )
+
+
+def parallel_write(
+    stream: TextIO,
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+    workers: int | None = None,
+    cache: FragmentCache = None,
+) -> None:
+    """Stream comments and response section, rendering top-level groups across a
+    process pool of `workers` processes (one per CPU if None)."""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        fragments = executor.map(
+            render_group,
+            grouped_records,
+            repeat(config),
+            repeat(outline_level),
+            repeat(cache),
+        )
+        for fragment, hits, misses, counts in fragments:
+            stream.write(fragment)
+            add_counts(counts)
+            if cache is not None:
+                cache.hits += hits
+                cache.misses += misses
@@ -0,0 +1,98 @@
+"""Pipelined rendering and saving of the section document.
+
+The document body is rendered in a worker thread, in chunks put on a bounded queue.
+Chunks are written to the docx package (and compressed) as they arrive, so rendering
+overlaps compression and at most `queue_size` chunks are held in memory.
+"""
+
+import asyncio
+from typing import TextIO
+
+from comment_response.write import ooxml
+from comment_response.write.cache import FragmentCache
+
+QUEUE_SIZE = 16  # Chunks waiting to be written
+CHUNK_SIZE = 2**16  # Characters per chunk
+
+
+class QueueWriter:
+    """Text stream putting chunks of the written text on an asyncio queue. Written to
+    from a worker thread, and blocks while the queue is full."""
+
+    def __init__(
+        self,
+        queue: asyncio.Queue,
+        loop: asyncio.AbstractEventLoop,
+        chunk_size: int = CHUNK_SIZE,
+    ):
+        self.queue = queue
+        self.loop = loop
+        self.chunk_size = chunk_size
+        self.buffer: list[str] = []
+        self.size = 0
+
+    def write(self, text: str) -> None:
+        self.buffer.append(text)
+        self.size += len(text)
+        if self.size >= self.chunk_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self.buffer:
+            chunk = "".join(self.buffer)
+            self.buffer = []
+            self.size = 0
+            asyncio.run_coroutine_threadsafe(self.queue.put(chunk), self.loop).result()
+
+
+async def pipelined_write_async(
+    stream: TextIO,
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+    cache: FragmentCache = None,
+    queue_size: int = QUEUE_SIZE,
+) -> None:
+    """Render the section in a worker thread while writing rendered chunks to
+    `stream` in another."""
+    queue = asyncio.Queue(queue_size)
+    writer = QueueWriter(queue, asyncio.get_running_loop())
+
+    def render():
+        ooxml.recursive_write(writer, grouped_records, config, outline_level, cache)
+        writer.flush()
+
+    async def produce():
+        try:
+            await asyncio.to_thread(render)
+        finally:
+            await queue.put(None)
+
+    async def consume():
+        error = None
+        while (chunk := await queue.get()) is not None:
+            if error is None:  # Keep draining the queue, so rendering never blocks
+                try:
+                    await asyncio.to_thread(stream.write, chunk)
+                except Exception as exc:
+                    error = exc
+        if error is not None:
+            raise error
+
+    await asyncio.gather(produce(), consume())
+
+
+def pipelined_write(
+    stream: TextIO,
+    grouped_records: list[dict],
+    config: dict,
+    outline_level: int = 0,
+    cache: FragmentCache = None,
+    queue_size: int = QUEUE_SIZE,
+) -> None:
+    """Stream comments and response section, overlapping rendering and saving."""
+    asyncio.run(
+        pipelined_write_async(
+            stream, grouped_records, config, outline_level, cache, queue_size
+        )
+    )
@@ -0,0 +1,97 @@
+"""Split a section into several documents (shards).
+
+Shards hold whole top-level headings, so each shard is written with the same headings
+and outline levels as in the full section. A master document lists the shards, with
+the top-level headings and number of comments of each.
+"""
+
+from collections.abc import Iterator
+from pathlib import Path
+
+from comment_response.group.statistics import GroupStats
+from comment_response.write import ooxml
+from comment_response.write.format_adapter import rpr_xml
+from comment_response.write.package import DEFAULT_COMPRESSION
+from comment_response.write.templates import NO_STYLES, template_package
+
+BOLD = rpr_xml({"bold": True})
+
+
+def group_count(node: dict) -> int:
+    """Number of comment groups under a node."""
+    if "records" in node:
+        return 1
+    return sum(group_count(child) for child in node["data"])
+
+
+def split_shards(
+    grouped_records: list[dict], max_groups: int = 0
+) -> Iterator[list[dict]]:
+    """Top-level nodes of each shard: one top-level node per shard, or consecutive
+    top-level nodes up to `max_groups` comment groups. Top-level nodes with more groups
+    are not split."""
+    shard = []
+    groups = 0
+    for node in grouped_records:
+        size = group_count(node) if max_groups else 0
+        if shard and (not max_groups or groups + size > max_groups):
+            yield shard
+            shard = []
+            groups = 0
+        shard.append(node)
+        groups += size
+    if shard:
+        yield shard
+
+
+def shard_path(path: Path, number: int) -> Path:
+    """Path of a shard, numbered after the section filename."""
+    return path.with_name(f"{path.stem}_{number:03d}{path.suffix}")
+
+
+def remove_stale_shards(path: Path, count: int) -> None:
+    """Remove the shards numbered after `count`, left by an earlier run with more
+    shards."""
+    for shard_file in path.parent.glob(f"{path.stem}_*{path.suffix}"):
+        number = shard_file.stem[len(path.stem) + 1 :]
+        if number.isdigit() and int(number) > count:
+            if shard_file == shard_path(path, int(number)):
+                shard_file.unlink()
+
+
+def shard_description(shard: list[dict]) -> str:
+    titles = [node["heading"].title for node in shard if "heading" in node]
+    if len(titles) < len(shard):
+        titles.append("(no heading)")
+    comments = ""
+    if all("stats" in node for node in shard):
+        count = GroupStats.total(node["stats"] for node in shard).comments
+        comments = f" ({count} comment{'s' if count != 1 else ''})"
+    return f"{', '.join(titles)}{comments}"
+
+
+def write_manifest(
+    filename: str | Path,
+    shards: list[tuple[Path, list[dict]]],
+    compression: int = DEFAULT_COMPRESSION,
+    template_cache: str | Path | None = None,
+) -> None:
+    """Write the master document, listing the shard documents and their contents."""
+    path = Path(filename)
+
+    def body(stream):
+        stream.write(ooxml.heading_xml(path.stem, 0))
+        for shard_file, shard in shards:
+            stream.write(
+                ooxml.paragraph_xml(
+                    "Normal",
+                    [
+                        ooxml.run_xml(shard_file.name, BOLD),
+                        ooxml.run_xml(f": {shard_description(shard)}"),
+                    ],
+                )
+            )
+
+    ooxml.write_package(
+        path, template_package(NO_STYLES, template_cache), body, compression
+    )
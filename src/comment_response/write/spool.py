@@ -0,0 +1,71 @@
+"""Bounded-memory writing of the section document.
+
+The "docx" writer holds the whole python-docx document until it is saved, and the
+"stream" writer holds the whole grouped section, with the text decoded from every cell.
+The "spool" writer takes the top-level nodes of the section one at a time (as yielded
+by `iter_group_columns`) and renders each one to a spooled temporary file, then
+releases the node and the decoded text of its cells. The spool is kept in memory up to
+`SPOOL_SIZE` and moved to disk beyond it, and the package is assembled from the spool
+once the body is complete. Peak memory then depends on the largest top-level heading
+rather than the whole section, besides the records read from the sheet, and the
+interning tables, which keep at most `SPOOL_INTERN_SIZE` cells while spooling.
+"""
+
+import shutil
+import tempfile
+from collections.abc import Iterable
+from pathlib import Path
+
+from comment_response.logger.profiler import stage
+from comment_response.parts.intern import intern_limit
+from comment_response.write import ooxml
+from comment_response.write.cache import FragmentCache
+from comment_response.write.package import DEFAULT_COMPRESSION
+
+SPOOL_SIZE = 2**22  # Bytes of rendered XML kept in memory before moving to disk
+SPOOL_INTERN_SIZE = 256  # Distinct cells (and rendered paragraphs) kept shared
+
+
+def release(node: dict) -> None:
+    """Drop the text decoded from the cells of the records under a node."""
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if "data" in node:
+            nodes.extend(node["data"])
+            continue
+        for record in node["records"]:
+            for cell in record.col.values():
+                release_value = getattr(cell.value, "release", None)
+                if release_value is not None:
+                    release_value()
+
+
+def spooled_write(
+    filename: str | Path,
+    template: bytes,
+    grouped_records: Iterable[dict],
+    config: dict,
+    outline_level: int = 0,
+    cache: FragmentCache = None,
+    compression: int = DEFAULT_COMPRESSION,
+    spool_size: int = SPOOL_SIZE,
+) -> None:
+    """Render the top-level nodes to a spool one at a time, releasing each one once
+    rendered, then write the docx package with the spooled body."""
+    with tempfile.SpooledTemporaryFile(
+        spool_size, "w+", encoding="utf-8", newline=""
+    ) as spool:
+        with stage("render"), intern_limit(SPOOL_INTERN_SIZE):
+            for node in grouped_records:
+                ooxml.recursive_write(spool, [node], config, outline_level, cache)
+                release(node)
+                del node  # Before the next node is grouped
+        spool.seek(0)
+        with stage("save"):
+            ooxml.write_package(
+                filename,
+                template,
+                lambda stream: shutil.copyfileobj(spool, stream),
+                compression,
+            )
@@ -0,0 +1,119 @@
+"""Prebuilt document templates.
+
+Building a template with python-docx (a blank document with the styles added by
+`styles.create_style`) takes longer than writing a small section, and importing
+python-docx takes most of the start-up time. Templates are built once for each set of
+style parameters, kept in memory as package bytes, and saved in an optional cache
+directory, so later runs copy them instead: the "stream" writer and AutoMark documents
+then never import python-docx.
+"""
+
+import hashlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import zipfile
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING
+from xml.etree import ElementTree
+
+if TYPE_CHECKING:
+    from docx.document import Document
+
+TEMPLATE_VERSION = "1"
+
+# Styles of a template: name and keyword arguments of `create_style`, in order.
+Styles = tuple[tuple[str, dict], ...]
+
+SECTION_STYLES: Styles = (
+    ("Comments", {}),
+    ("Response", {"left_indent": 0.5, "next_style": "Response"}),
+)
+NO_STYLES: Styles = ()
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+_templates: dict[str, bytes] = {}
+_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def default_template_hash() -> str:
+    """Hash of the python-docx default template, found without importing
+    python-docx."""
+    spec = importlib.util.find_spec("docx")
+    path = Path(spec.submodule_search_locations[0], "templates", "default.docx")
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def template_key(styles: Styles) -> str:
+    source = json.dumps(
+        [TEMPLATE_VERSION, default_template_hash(), styles], sort_keys=True
+    )
+    return hashlib.sha256(source.encode()).hexdigest()[:32]
+
+
+def build_template(styles: Styles) -> bytes:
+    """Package of a new python-docx document with the styles."""
+    import docx  # Only needed to build templates missing from the cache
+
+    from comment_response.write.styles import create_style
+
+    doc = docx.Document()
+    for name, options in styles:
+        create_style(doc, name, **options)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def template_package(
+    styles: Styles = SECTION_STYLES, directory: str | Path | None = None
+) -> bytes:
+    """Package of a template with the styles, read from memory or the cache
+    directory, or built and saved to the cache directory."""
+    key = template_key(styles)
+    with _lock:
+        if key in _templates:
+            return _templates[key]
+        path = Path(directory, f"{key}.docx") if directory else None
+        if path is not None and path.exists():
+            package = path.read_bytes()
+        else:
+            package = build_template(styles)
+            if path is not None:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(
+                    dir=path.parent, suffix=".tmp", delete=False
+                ) as file:
+                    file.write(package)
+                os.replace(file.name, path)
+        _templates[key] = package
+        return package
+
+
+def template_document(
+    styles: Styles = SECTION_STYLES, directory: str | Path | None = None
+) -> "Document":
+    """python-docx document opened from the template package."""
+    import docx
+
+    return docx.Document(io.BytesIO(template_package(styles, directory)))
+
+
+def text_width(package: bytes) -> int:
+    """Width between the page margins of the last section of a package, in twips."""
+    with zipfile.ZipFile(io.BytesIO(package)) as source:
+        root = ElementTree.fromstring(source.read("word/document.xml"))
+    sect_pr = root.findall(f".//{W}sectPr")[-1]
+    size = sect_pr.find(f"{W}pgSz")
+    margins = sect_pr.find(f"{W}pgMar")
+    return (
+        int(size.get(f"{W}w"))
+        - int(margins.get(f"{W}left"))
+        - int(margins.get(f"{W}right"))
+    )
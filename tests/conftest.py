@@ -0,0 +1,43 @@
+import copy
+import tomllib
+from pathlib import Path
+
+import pytest
+
+from comment_response.read.xlsx import StreamingWorkbook
+from comment_response.section import required_columns
+
+ROOT = Path(__file__).parent.parent
+WORKBOOK = ROOT / "tests" / "comments.xlsx"
+SHEETNAME = "Comments"
+
+
+@pytest.fixture(scope="session")
+def example_config() -> dict:
+    with open(ROOT / "config.EXAMPLE.toml", "rb") as file:
+        return tomllib.load(file)
+
+
+@pytest.fixture
+def section_config(example_config) -> dict:
+    return copy.deepcopy(example_config["section"])
+
+
+@pytest.fixture
+def workbook_path() -> Path:
+    return WORKBOOK
+
+
+@pytest.fixture
+def sheetname() -> str:
+    return SHEETNAME
+
+
+@pytest.fixture
+def workbook(workbook_path) -> StreamingWorkbook:
+    return StreamingWorkbook(str(workbook_path))
+
+
+@pytest.fixture
+def sheet(workbook, sheetname, section_config):
+    return workbook.sheet(sheetname, 1, required_columns(section_config))
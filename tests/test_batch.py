@@ -0,0 +1,41 @@
+import pytest
+
+from comment_response.batch import open_workbook, write_section
+
+
+@pytest.fixture
+def batch_config(tmp_path, example_config, workbook_path, sheetname) -> dict:
+    return example_config | {
+        "filename": str(workbook_path),
+        "sheetname": sheetname,
+        "reader": "stream",
+        "savename": str(tmp_path / "section.docx"),
+        "automark": str(tmp_path / "automark.docx"),
+    }
+
+
+def test_pipeline_with_docx_writer(tmp_path, batch_config):
+    config = batch_config | {"writer": "docx", "pipeline": True}
+    write_section(open_workbook(config), config)
+    assert {path.name for path in tmp_path.iterdir()} == {
+        "section.docx",
+        "automark.docx",
+    }
+
+
+def test_unsupported_options_fail_before_writing(tmp_path, batch_config):
+    config = batch_config | {"writer": "docx", "pipeline": True, "workers": 2}
+    with pytest.raises(ValueError):
+        write_section(open_workbook(config), config)
+    assert not list(tmp_path.iterdir())
+
+
+def test_stale_shards_are_removed(tmp_path, batch_config):
+    config = batch_config | {"writer": "stream", "shards": True}
+    write_section(open_workbook(config), config)
+    shards = sorted(tmp_path.glob("section_*.docx"))
+    assert len(shards) > 1
+
+    config["shard_groups"] = 10**6  # All top-level headings in one shard
+    write_section(open_workbook(config), config)
+    assert sorted(tmp_path.glob("section_*.docx")) == shards[:1]
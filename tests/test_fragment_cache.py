@@ -0,0 +1,20 @@
+import copy
+
+from comment_response.section import Section
+from comment_response.write.cache import FragmentCache
+
+
+def test_parallel_write_hits_serial_cache(tmp_path, sheet, section_config):
+    cache = FragmentCache(tmp_path / "cache")
+    Section(sheet, **copy.deepcopy(section_config)).write(
+        tmp_path / "serial.docx", 2, "stream", cache=cache
+    )
+    assert cache.misses and not cache.hits
+    entries = len(list(cache.directory.glob("*.xml")))
+
+    cache = FragmentCache(tmp_path / "cache")
+    Section(sheet, **copy.deepcopy(section_config)).write(
+        tmp_path / "parallel.docx", 2, "stream", workers=2, cache=cache
+    )
+    assert cache.hits and not cache.misses
+    assert len(list(cache.directory.glob("*.xml"))) == entries
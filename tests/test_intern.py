@@ -0,0 +1,15 @@
+from comment_response.parts.intern import InternTable
+
+
+def test_overlapping_limits_restore_size():
+    table = InternTable("test", maxsize=8)
+    first, second = table.limit(4), table.limit(2)
+    first.__enter__()
+    second.__enter__()
+    for key in range(6):
+        table.get(key, lambda: key)
+    assert table.maxsize == 2 and len(table.values) == 2
+    first.__exit__(None, None, None)  # Exits before the limit entered after it
+    assert table.maxsize == 2
+    second.__exit__(None, None, None)
+    assert table.maxsize == 8
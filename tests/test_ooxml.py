@@ -0,0 +1,18 @@
+import docx
+import pytest
+
+from comment_response.write import ooxml
+
+
+@pytest.mark.parametrize("text", ["vertical\x0btab", "null\x00", "start\x01"])
+def test_invalid_xml_characters_rejected_like_docx(text):
+    with pytest.raises(ValueError):
+        docx.Document().add_paragraph().add_run(text)
+    with pytest.raises(ValueError):
+        ooxml.run_xml(text)
+
+
+def test_tabs_and_line_breaks_are_written():
+    assert ooxml.run_xml("a\tb\nc") == (
+        "<w:r><w:t>a</w:t><w:tab/><w:t>b</w:t><w:br/><w:t>c</w:t></w:r>"
+    )
@@ -0,0 +1,21 @@
+import zipfile
+
+import docx
+import pytest
+
+from comment_response.write.package import save_document
+
+
+@pytest.mark.parametrize(
+    "compression, method", [(0, zipfile.ZIP_STORED), (6, zipfile.ZIP_DEFLATED)]
+)
+def test_save_document_at_compression(tmp_path, compression, method):
+    document = docx.Document()
+    document.add_paragraph("Comment")
+    path = tmp_path / "section.docx"
+    save_document(path, document, compression)
+
+    assert [path.name for path in tmp_path.iterdir()] == ["section.docx"]
+    with zipfile.ZipFile(path) as package:
+        assert {member.compress_type for member in package.infolist()} == {method}
+    assert docx.Document(path).paragraphs[-1].text == "Comment"
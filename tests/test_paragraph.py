@@ -0,0 +1,13 @@
+from xlsx_rich_text.cell.run import Run
+
+from comment_response.parts.paragraph import Paragraph
+
+
+def test_clean_keeps_texts_with_their_runs():
+    runs = [Run("  a\0b  ", {}), Run("bold   text ", {"b": {}}), Run(" end\0 ", {})]
+    paragraph = Paragraph(runs)
+    assert [(run.text, run.props) for run in paragraph.runs] == [
+        ("a\0b ", {}),
+        ("bold text ", {"b": {}}),
+        (" end\0", {}),
+    ]
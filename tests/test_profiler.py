@@ -0,0 +1,17 @@
+import copy
+
+from comment_response.logger import profiler
+from comment_response.section import Section
+
+
+def test_formatted_runs_match_across_writers(tmp_path, sheet, section_config):
+    counts = []
+    for writer, workers in (("docx", 1), ("stream", 1), ("stream", 2)):
+        profiler.start()
+        Section(sheet, **copy.deepcopy(section_config)).write(
+            tmp_path / f"{writer}_{workers}.docx", 2, writer, workers=workers
+        )
+        counts.append(profiler.report()["counters"])
+    assert counts[0]["formatted runs"]
+    assert counts[1] == counts[0]
+    assert counts[2] == counts[0]
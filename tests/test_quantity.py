@@ -0,0 +1,37 @@
+import io
+
+from xlsx_rich_text.cell.run import Run
+
+from comment_response.group.sort_records import Heading
+from comment_response.group.statistics import GroupStats
+from comment_response.parts.comment_group import CommentGroup
+from comment_response.read.records import CompactCell, CompactRecord, CompactRichText
+from comment_response.write import ooxml
+from comment_response.write.docx import indicate_quantity
+
+
+def record(comment: str, tag: str) -> CompactRecord:
+    return CompactRecord(
+        {
+            "Comment Data": CompactCell(CompactRichText((Run(comment, {}),))),
+            "File Name": CompactCell(CompactRichText((Run(tag, {}),))),
+        }
+    )
+
+
+def test_collapsed_group_is_titled_as_single_comment(section_config):
+    section_config["other"]["custom"]["collapse_comments"] = True
+    quantity = section_config["other"]["quantity"]
+    records = [record("Same comment", "a.docx"), record("Same comment", "b.docx")]
+    stats = GroupStats(records=2, comments=2)
+
+    group = CommentGroup(records, section_config)
+    assert len(group.comments) == 1
+    assert indicate_quantity(group, quantity, stats) == quantity["single_comment"]
+
+    node = {"heading": Heading(1, "Title"), "data": [{"records": records}]}
+    stream = io.StringIO()
+    ooxml.recursive_write(stream, [node | {"stats": stats}], section_config)
+    xml = stream.getvalue()
+    assert f"{quantity['single_comment']}Title" in xml
+    assert quantity["multiple_comments"] not in xml
@@ -0,0 +1,53 @@
+import shutil
+import zipfile
+
+from comment_response.read.sheet_cache import SheetCache
+from comment_response.read.xlsx import StreamingWorkbook
+from comment_response.write.cache import cell_key
+
+
+def cell_keys(sheet) -> list[str]:
+    return [
+        cell_key(cell)
+        for record in sheet.records.values()
+        for cell in record.col.values()
+    ]
+
+
+def test_cached_cells_keep_reader_keys(tmp_path, workbook, sheetname):
+    cached = SheetCache(tmp_path / "cache").sheet(workbook, sheetname)
+    assert cell_keys(cached) == cell_keys(workbook.sheet(sheetname))
+    cached.data.close()
+
+
+def test_stale_cache_is_closed_before_removal(tmp_path, workbook_path, sheetname):
+    path = tmp_path / "comments.xlsx"
+    shutil.copy(workbook_path, path)
+    cache = SheetCache(tmp_path / "cache")
+    old = cache.sheet(StreamingWorkbook(str(path)), sheetname)
+    texts = [str(record.col.get("Comment Data")) for record in old.records.values()]
+
+    with zipfile.ZipFile(path, "a") as package:
+        package.comment = b"changed"
+    new = cache.sheet(StreamingWorkbook(str(path)), sheetname)
+
+    assert old.data.closed and not new.data.closed
+    assert [path.name for path in cache.directory.iterdir()] == [new.data.path.name]
+    assert [
+        str(record.col.get("Comment Data")) for record in old.records.values()
+    ] == texts
+    new.data.close()
+
+
+def test_truncated_cache_is_rebuilt(tmp_path, workbook, sheetname):
+    cache = SheetCache(tmp_path / "cache")
+    cached = cache.sheet(workbook, sheetname)
+    path = cached.data.path
+    cached.data.close()
+
+    for size in (10, path.stat().st_size // 2):
+        with open(path, "r+b") as file:
+            file.truncate(size)
+        rebuilt = cache.sheet(workbook, sheetname)
+        assert cell_keys(rebuilt) == cell_keys(workbook.sheet(sheetname))
+        rebuilt.data.close()
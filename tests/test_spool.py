@@ -0,0 +1,29 @@
+from benchmarks.generate import SHEETNAME, WorkbookSpec, generate
+from benchmarks.memory import measure
+from benchmarks.synthetic import section_config
+
+ROWS_PER_HEADING = 25
+
+
+def spool_peak(tmp_path, headings: int) -> int:
+    """Peak memory of writing a section with the "spool" writer (in a new
+    interpreter), above the memory of its records."""
+    spec = WorkbookSpec(rows=headings * ROWS_PER_HEADING, levels=1, headings=headings)
+    workbook = tmp_path / f"{headings}.xlsx"
+    generate(str(workbook), spec)
+    config = {
+        "filename": str(workbook),
+        "sheetname": SHEETNAME,
+        "header_row": 1,
+        "reader": "stream",
+        "section": section_config(spec.levels),
+        "writer": "spool",
+        "savename": str(tmp_path / f"{headings}.docx"),
+    }
+    return measure(config)["write"]
+
+
+def test_spool_peak_does_not_grow_with_headings(tmp_path):
+    # Both sections fill the interning tables and the in-memory part of the spool
+    small, large = spool_peak(tmp_path, 32), spool_peak(tmp_path, 64)
+    assert large < small * 1.2